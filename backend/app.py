@@ -4,16 +4,22 @@ Flask application for transcribing audio and generating Reuters-style captions
 """
 
 import os
+import json
+import time
 import logging
+import threading
+import multiprocessing
 from pathlib import Path
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, g, request, jsonify, send_from_directory, stream_with_context
 from flask_cors import CORS
-from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
 
-# Import services
-import whisper_service
-import claude_service
+# Import services. whisper_service (torch) and claude_service (the Anthropic SDK)
+# take seconds to import, so they and the services built on them (pipeline_service,
+# upload_service) are imported inside the routes that use them
+import job_service
+import metrics_service
+import profiling_service
 
 # Load environment variables
 load_dotenv()
@@ -37,7 +43,55 @@ UPLOAD_FOLDER.mkdir(exist_ok=True)
 app = Flask(__name__, static_folder="../frontend/public")
 CORS(app)  # Enable CORS for all routes
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
-app.config["MAX_CONTENT_LENGTH"] = 16 * 1024 * 1024  # 16MB max upload size
+app.config["MAX_CONTENT_LENGTH"] = 16 * 1024 * 1024  # 16MB max request; larger files use /api/uploads
+
+# Import the heavy services on a background thread at startup, so the first request
+# does not pay for them (False: import on first use)
+WARMUP_IMPORTS = os.getenv("WARMUP_IMPORTS", "True").lower() == "true"
+
+# Background import progress reported by /api/ready
+_warmup_status = {
+    "state": "not_started",  # not_started | importing | ready | error
+    "error": None,
+    "import_seconds": None,
+}
+
+
+def warm_up():
+    """
+    Import the heavy services, then start the Whisper model preload if enabled
+
+    Runs on a background thread. A request that needs one of these modules
+    while the import is still running waits on Python's import lock for it.
+    """
+    _warmup_status.update(state="importing")
+    started = time.perf_counter()
+    try:
+        import whisper_service
+        import claude_service
+        import pipeline_service
+        import upload_service
+    except Exception as e:
+        _warmup_status.update(state="error", error=str(e))
+        logger.error(f"Error importing services: {str(e)}")
+        return
+    _warmup_status.update(state="ready", import_seconds=round(time.perf_counter() - started, 2))
+    logger.info(f"Services imported in {_warmup_status['import_seconds']}s")
+
+    # Start loading the Whisper model in the background if eager loading is enabled
+    if whisper_service.WHISPER_PRELOAD:
+        whisper_service.preload_model_async()
+
+
+# Not in transcription pool workers, which re-import this module and load their own model
+if WARMUP_IMPORTS and multiprocessing.parent_process() is None:
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
+# Interval between status events while streaming a job's progress
+JOB_STREAM_KEEPALIVE_SECONDS = 15
+
+# Endpoints that can be profiled per request (X-Profile: 1 or ?profile=1)
+PROFILED_ENDPOINTS = {"/api/transcribe", "/api/upload-audio", "/api/generate-caption"}
 
 # Allowed audio file extensions
 ALLOWED_EXTENSIONS = {"wav", "mp3", "ogg", "m4a", "flac"}
@@ -48,6 +102,70 @@ def allowed_file(filename):
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+@app.before_request
+def start_request_metrics():
+    """Track API requests in flight for /api/metrics"""
+    rule = request.url_rule
+    if not metrics_service.METRICS or rule is None or not rule.rule.startswith("/api/"):
+        return
+    if rule.rule == "/api/metrics":
+        return
+    g.metrics_endpoint = rule.rule
+    g.metrics_started = metrics_service.request_started(rule.rule)
+
+
+@app.before_request
+def start_request_profile():
+    """Start a sampling profiler for requests that opt in, when profiling is enabled"""
+    if not profiling_service.PROFILING or request.url_rule is None:
+        return
+    if request.url_rule.rule in PROFILED_ENDPOINTS and profiling_service.profile_requested(request.headers, request.args):
+        g.profiler = profiling_service.SamplingProfiler(label=f"{request.method} {request.path}")
+        g.profiler.start()
+
+
+@app.after_request
+def finish_request_profile(response):
+    """Save the request's profile and return its id in the X-Profile-Id header"""
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        profiler.stop()
+        try:
+            profiler.save()
+            response.headers["X-Profile-Id"] = profiler.id
+        except Exception as e:
+            logger.error(f"Error saving profile {profiler.id}: {str(e)}")
+    return response
+
+
+@app.after_request
+def capture_response_status(response):
+    """Remember the status code for the request's metrics"""
+    g.metrics_status = response.status_code
+    return response
+
+
+@app.teardown_request
+def finish_request_metrics(error=None):
+    """Record latency and status once the request (and any stream) is done"""
+    # A request that failed before its response was built leaves its profiler running
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        profiler.stop()
+
+    endpoint = g.pop("metrics_endpoint", None)
+    if endpoint is not None:
+        status = g.get("metrics_status", 500)
+        metrics_service.request_finished(endpoint, status, g.metrics_started)
+
+
+def queue_full_response(error):
+    """Build the 429 response returned when the transcription queue is full"""
+    response = jsonify({"error": str(error)})
+    response.headers["Retry-After"] = "5"
+    return response, 429
+
+
 @app.route("/")
 def index():
     """Serve the frontend index.html file"""
@@ -66,6 +184,75 @@ def health_check():
     return jsonify({"status": "ok"})
 
 
+@app.route("/api/ready")
+def ready_check():
+    """
+    Readiness endpoint reporting Whisper model load progress
+
+    Returns:
+        - JSON with model load state ("importing" while the services are still
+          being imported); HTTP 503 until the model is ready
+    """
+    if _warmup_status["state"] in ("importing", "error"):
+        status = {
+            "state": _warmup_status["state"],
+            "error": _warmup_status["error"],
+            "ready": False,
+        }
+        return jsonify(status), 503
+    
+    import whisper_service
+    status = whisper_service.get_model_status()
+    return jsonify(status), 200 if status["ready"] else 503
+
+
+@app.route("/api/metrics")
+def metrics():
+    """
+    Metrics endpoint in the Prometheus text exposition format
+
+    Returns:
+        - Per-stage latency histograms, audio and token counters, errors by
+          type, requests in flight and model load state
+    """
+    if not metrics_service.METRICS:
+        return jsonify({"error": "Metrics are disabled"}), 404
+    return Response(metrics_service.render_metrics(), content_type=metrics_service.CONTENT_TYPE)
+
+
+@app.route("/api/profiles/<profile_id>")
+def get_profile(profile_id):
+    """
+    Download a saved request profile
+
+    Returns:
+        - Collapsed stacks ("frame;frame;... count" per line) for flamegraph.pl,
+          inferno or speedscope; 404 if profiling is off or the id is unknown
+    """
+    if not profiling_service.PROFILING:
+        return jsonify({"error": "Profiling is disabled"}), 404
+    path = profiling_service.get_profile_path(profile_id)
+    if path is None:
+        return jsonify({"error": "Profile not found"}), 404
+    return send_from_directory(path.parent.resolve(), path.name, mimetype="text/plain")
+
+
+@app.route("/api/cache/stats")
+def cache_stats():
+    """
+    Cache statistics endpoint
+    
+    Returns:
+        - JSON with hit/miss counters for each cache
+    """
+    import whisper_service
+    import claude_service
+    return jsonify({
+        "transcription": whisper_service.get_cache_stats(),
+        "caption": claude_service.get_cache_stats(),
+    })
+
+
 @app.route("/api/transcribe", methods=["POST"])
 def transcribe_audio():
     """
@@ -75,8 +262,9 @@ def transcribe_audio():
         - audio_file: Audio file in the request
         
     Returns:
-        - JSON with transcription text
+        - JSON with transcription text, speech_detected flag and VAD stats
     """
+    import whisper_service
     try:
         # Check if the post request has the file part
         if "audio_file" not in request.files:
@@ -92,19 +280,15 @@ def transcribe_audio():
         if not allowed_file(file.filename):
             return jsonify({"error": f"File type not allowed. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"}), 400
         
-        # Save the file
-        filename = secure_filename(file.filename)
-        file_path = os.path.join(app.config["UPLOAD_FOLDER"], filename)
-        file.save(file_path)
-        
-        # Transcribe the audio
-        transcription = whisper_service.transcribe_audio(file_path)
+        # Decode straight from the upload stream and transcribe on the worker pool
+        result = job_service.get_job_queue().run(
+            whisper_service.transcribe_audio_bytes, file.stream
+        )
         
-        # Clean up the file
-        whisper_service.cleanup_audio_file(file_path)
-        
-        return jsonify({"transcription": transcription})
+        return jsonify(result)
     
+    except job_service.QueueFullError as e:
+        return queue_full_response(e)
     except Exception as e:
         logger.error(f"Error in transcribe_audio: {str(e)}")
         return jsonify({"error": str(e)}), 500
@@ -117,10 +301,12 @@ def generate_caption():
     
     Expects:
         - JSON with transcription text
+        - bypass_cache (optional): true to always call the model
         
     Returns:
         - JSON with formatted caption, missing information, and follow-up questions
     """
+    import pipeline_service
     try:
         # Get the transcription from the request
         data = request.json
@@ -131,7 +317,9 @@ def generate_caption():
         transcription = data["transcription"]
         
         # Generate the caption
-        caption_data = claude_service.generate_caption(transcription)
+        caption_data = pipeline_service.generate_caption(
+            transcription, use_cache=not data.get("bypass_cache", False)
+        )
         
         return jsonify(caption_data)
     
@@ -140,6 +328,149 @@ def generate_caption():
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/api/generate-caption/batch", methods=["POST"])
+def generate_caption_batch():
+    """
+    Endpoint to generate captions for several transcriptions at once
+    
+    Expects:
+        - JSON with transcriptions: list of transcription texts
+        - bypass_cache (optional): true to always call the model
+        
+    Returns:
+        - JSON with results in input order; failed items carry an error message
+    """
+    import claude_service
+    try:
+        data = request.json
+        
+        if not data or not isinstance(data.get("transcriptions"), list):
+            return jsonify({"error": "No transcriptions provided"}), 400
+        
+        transcriptions = data["transcriptions"]
+        if len(transcriptions) > claude_service.CAPTION_BATCH_MAX_ITEMS:
+            return jsonify({"error": f"Too many transcriptions (max {claude_service.CAPTION_BATCH_MAX_ITEMS})"}), 400
+        if not all(isinstance(transcription, str) for transcription in transcriptions):
+            return jsonify({"error": "Transcriptions must be strings"}), 400
+        
+        results = claude_service.generate_captions_batch(
+            transcriptions, use_cache=not data.get("bypass_cache", False)
+        )
+        
+        return jsonify({"results": results})
+    
+    except Exception as e:
+        logger.error(f"Error in generate_caption_batch: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/sessions", methods=["POST"])
+def create_session():
+    """
+    Endpoint to start a server-side caption refinement session
+    
+    Expects:
+        - JSON with transcription text
+        - formatted_caption and missing_information (optional): a caption already
+          generated for this transcription, to seed the session without a model call
+        
+    Returns:
+        - JSON with session_id, formatted caption and missing information
+    """
+    import claude_service
+    try:
+        data = request.json
+        
+        if not data or "transcription" not in data:
+            return jsonify({"error": "No transcription provided"}), 400
+        
+        sections = None
+        if "formatted_caption" in data:
+            sections = {
+                "formatted_caption": data["formatted_caption"],
+                "missing_information": data.get("missing_information", []),
+            }
+        
+        return jsonify(claude_service.create_session(data["transcription"], sections))
+    
+    except Exception as e:
+        logger.error(f"Error in create_session: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/sessions/<session_id>/refine", methods=["POST"])
+def refine_session(session_id):
+    """
+    Endpoint to refine a session's caption with a new detail
+    
+    Expects:
+        - JSON with details text (only the new information)
+        
+    Returns:
+        - JSON with session_id, updated caption and missing information;
+          HTTP 404 if the session has expired
+    """
+    import claude_service
+    try:
+        data = request.json
+        
+        if not data or not data.get("details", "").strip():
+            return jsonify({"error": "No details provided"}), 400
+        
+        return jsonify(claude_service.refine_session(session_id, data["details"].strip()))
+    
+    except claude_service.SessionNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    except Exception as e:
+        logger.error(f"Error in refine_session: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+def sse_event(event, data):
+    """Format a single Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.route("/api/generate-caption/stream", methods=["POST"])
+def generate_caption_stream():
+    """
+    Endpoint to stream a Reuters-style caption as Server-Sent Events
+    
+    Expects:
+        - JSON with transcription text
+        - bypass_cache (optional): true to always call the model
+        
+    Returns:
+        - text/event-stream with a formatted_caption event as soon as the caption
+          section is complete, a missing_information event per item, then a done
+          event with the full result (or an error event)
+    """
+    import claude_service
+    data = request.json
+    
+    if not data or "transcription" not in data:
+        return jsonify({"error": "No transcription provided"}), 400
+    
+    transcription = data["transcription"]
+    use_cache = not data.get("bypass_cache", False)
+    
+    def events():
+        try:
+            for event, value in claude_service.generate_caption_stream(transcription, use_cache=use_cache):
+                if event == "done":
+                    yield sse_event(event, value)
+                else:
+                    yield sse_event(event, {event: value})
+        except Exception as e:
+            logger.error(f"Error in generate_caption_stream: {str(e)}")
+            yield sse_event("error", {"error": str(e)})
+    
+    response = Response(stream_with_context(events()), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
 @app.route("/api/upload-audio", methods=["POST"])
 def upload_audio():
     """
@@ -149,8 +480,9 @@ def upload_audio():
         - audio_blob: Audio blob data in the request
         
     Returns:
-        - JSON with transcription text
+        - JSON with transcription text, speech_detected flag and VAD stats
     """
+    import whisper_service
     try:
         # Check if the post request has the file part
         if "audio_blob" not in request.files:
@@ -158,22 +490,257 @@ def upload_audio():
         
         file = request.files["audio_blob"]
         
-        # Save the audio blob to a temporary file
-        temp_file_path = whisper_service.save_audio_file(file.read())
+        # Decode straight from the upload stream and transcribe on the worker pool
+        result = job_service.get_job_queue().run(
+            whisper_service.transcribe_audio_bytes, file.stream
+        )
         
-        # Transcribe the audio
-        transcription = whisper_service.transcribe_audio(temp_file_path)
+        return jsonify(result)
+    
+    except job_service.QueueFullError as e:
+        return queue_full_response(e)
+    except Exception as e:
+        logger.error(f"Error in upload_audio: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/uploads", methods=["POST"])
+def create_upload():
+    """
+    Endpoint to start a chunked, resumable audio upload
+    
+    Expects:
+        - JSON with filename, plus optional chunk_size and total_size in bytes
+        - transcribe_early (optional): true to start transcribing chunks as they arrive
         
-        # Clean up the temporary file
-        whisper_service.cleanup_audio_file(temp_file_path)
+    Returns:
+        - JSON with upload_id, chunk_size and next_chunk (HTTP 201)
+    """
+    import upload_service
+    try:
+        data = request.get_json(silent=True) or {}
+        filename = data.get("filename") or "recording.wav"
+        if "." in filename and not allowed_file(filename):
+            return jsonify({"error": f"File type not allowed. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"}), 400
         
-        return jsonify({"transcription": transcription})
+        upload = upload_service.create_upload(
+            filename,
+            chunk_size=data.get("chunk_size"),
+            total_size=data.get("total_size"),
+            transcribe_early=bool(data.get("transcribe_early", False)),
+        )
+        return jsonify(upload), 201
     
+    except upload_service.UploadError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        logger.error(f"Error in upload_audio: {str(e)}")
+        logger.error(f"Error in create_upload: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/api/uploads/<upload_id>", methods=["GET"])
+def get_upload(upload_id):
+    """
+    Endpoint to check an upload's progress, e.g. before resuming it
+    
+    Returns:
+        - JSON with received_chunks, received_bytes and next_chunk
+    """
+    import upload_service
+    try:
+        return jsonify(upload_service.get_upload(upload_id).to_dict())
+    except upload_service.UploadNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+
+
+@app.route("/api/uploads/<upload_id>/chunks/<int:index>", methods=["PUT"])
+def put_upload_chunk(upload_id, index):
+    """
+    Endpoint to store one numbered chunk of an upload
+    
+    Expects:
+        - Raw chunk bytes as the request body; every chunk but the last must
+          be exactly chunk_size bytes. Re-sending a chunk replaces it.
+        
+    Returns:
+        - JSON with the upload's progress, including next_chunk
+    """
+    import upload_service
+    try:
+        return jsonify(upload_service.write_chunk(upload_id, index, request.stream))
+    except upload_service.UploadNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    except upload_service.ChunkTooLargeError as e:
+        return jsonify({"error": str(e)}), 413
+    except upload_service.UploadError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error in put_upload_chunk: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/uploads/<upload_id>/finalize", methods=["POST"])
+def finalize_upload(upload_id):
+    """
+    Endpoint to complete an upload and transcribe it
+    
+    Returns:
+        - JSON with transcription text and speech_detected flag, HTTP 409
+          with the missing chunk numbers if the upload is incomplete
+    """
+    import upload_service
+    try:
+        return jsonify(upload_service.finalize_upload(upload_id))
+    except upload_service.UploadNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    except upload_service.IncompleteUploadError as e:
+        return jsonify({"error": str(e), "missing_chunks": e.missing}), 409
+    except upload_service.UploadError as e:
+        return jsonify({"error": str(e)}), 409
+    except job_service.QueueFullError as e:
+        return queue_full_response(e)
+    except Exception as e:
+        logger.error(f"Error in finalize_upload: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/uploads/<upload_id>", methods=["DELETE"])
+def abort_upload(upload_id):
+    """Endpoint to cancel an upload and delete what was received"""
+    import upload_service
+    try:
+        upload_service.abort_upload(upload_id)
+        return jsonify({"upload_id": upload_id, "status": "aborted"})
+    except upload_service.UploadNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+
+
+@app.route("/api/caption-from-audio", methods=["POST"])
+def caption_from_audio():
+    """
+    Endpoint to transcribe audio and generate its caption in one round trip
+    
+    Expects:
+        - audio_file or audio_blob: Audio in the request
+        - bypass_cache (optional form field): "true" to always call the model
+        - two_pass (optional form field): "false" to skip the draft pass when
+          WHISPER_DRAFT_MODEL is set
+        
+    Returns:
+        - JSON with transcription, formatted caption, missing information
+          and per-stage timings; in two-pass mode the result is a draft and
+          upgrade_job_id can be polled for the main model's result
+    """
+    import whisper_service
+    import pipeline_service
+    try:
+        file = request.files.get("audio_file") or request.files.get("audio_blob")
+        if file is None:
+            return jsonify({"error": "No audio file provided"}), 400
+        
+        if file.filename and "." in file.filename and not allowed_file(file.filename):
+            return jsonify({"error": f"File type not allowed. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"}), 400
+        
+        audio_data = file.read()
+        use_cache = request.form.get("bypass_cache", "false").lower() != "true"
+        
+        if whisper_service.WHISPER_DRAFT_MODEL and request.form.get("two_pass", "true").lower() != "false":
+            # Draft pass on the job queue now; the main model upgrades it in the background
+            result = pipeline_service.caption_from_audio_two_pass(audio_data, use_cache=use_cache)
+        else:
+            result = pipeline_service.caption_from_audio(
+                lambda: job_service.get_job_queue().run(whisper_service.transcribe_audio_bytes, audio_data),
+                use_cache=use_cache,
+            )
+        
+        return jsonify(result)
+    
+    except job_service.QueueFullError as e:
+        return queue_full_response(e)
+    except Exception as e:
+        logger.error(f"Error in caption_from_audio: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/jobs/transcribe", methods=["POST"])
+def create_transcription_job():
+    """
+    Endpoint to queue an asynchronous transcription job
+    
+    Expects:
+        - audio_file or audio_blob: Audio in the request
+        - callback_url (optional): http(s) URL that receives the finished job as a
+          JSON POST; private addresses are rejected unless JOB_CALLBACK_ALLOWED_HOSTS
+          lists the host
+        
+    Returns:
+        - JSON with the job id (HTTP 202), or HTTP 429 if the queue is full
+    """
+    import whisper_service
+    try:
+        file = request.files.get("audio_file") or request.files.get("audio_blob")
+        if file is None:
+            return jsonify({"error": "No audio file provided"}), 400
+        
+        # Named uploads must have an allowed extension; browser blobs have none
+        if file.filename and "." in file.filename and not allowed_file(file.filename):
+            return jsonify({"error": f"File type not allowed. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"}), 400
+        
+        job = job_service.get_job_queue().submit(
+            whisper_service.transcribe_audio_bytes,
+            file.read(),
+            callback_url=request.form.get("callback_url"),
+        )
+        
+        return jsonify({"job_id": job.id, "status": job.status}), 202
+    
+    except job_service.InvalidCallbackError as e:
+        return jsonify({"error": str(e)}), 400
+    except job_service.QueueFullError as e:
+        return queue_full_response(e)
+    except Exception as e:
+        logger.error(f"Error in create_transcription_job: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/jobs/<job_id>")
+def get_job(job_id):
+    """
+    Endpoint to poll the status of a queued job
+    
+    Returns:
+        - JSON with job status, and the result or error once finished
+    """
+    job = job_service.get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route("/api/jobs/<job_id>/stream")
+def stream_job(job_id):
+    """
+    Endpoint to wait for a job over Server-Sent Events
+    
+    Returns:
+        - text/event-stream with periodic status events and a final done event
+          carrying the job's result or error
+    """
+    job = job_service.get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    
+    def events():
+        while not job.wait(timeout=JOB_STREAM_KEEPALIVE_SECONDS):
+            yield sse_event("status", {"job_id": job.id, "status": job.status})
+        yield sse_event("done", job.to_dict())
+    
+    response = Response(stream_with_context(events()), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
 if __name__ == "__main__":
     logger.info(f"Starting Reuters Caption Generator on port {PORT}")
     app.run(host="0.0.0.0", port=PORT, debug=DEBUG)
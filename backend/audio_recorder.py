@@ -19,34 +19,142 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# Whisper's native sample rate - recording at it avoids a resample before inference
+DEFAULT_SAMPLE_RATE = 16000
+
+# Fallback rate for input devices that cannot open a 16 kHz stream
+FALLBACK_SAMPLE_RATE = 44100
+
+# Initial capture buffer length in seconds; the buffer doubles when full
+INITIAL_BUFFER_SECONDS = 60
+
+# Streaming mode: how often finished windows are checked for, and how far back
+# from the end of a window to look for a quiet point to cut at
+WINDOW_POLL_SECONDS = 0.5
+WINDOW_SEARCH_SECONDS = 5
+WINDOW_FRAME_SECONDS = 0.1
+
+
+def find_quiet_cut(audio, search_start, frame_length):
+    """
+    Find the quietest frame boundary in audio[search_start:]
+
+    Args:
+        audio (np.ndarray): Mono samples
+        search_start (int): First sample of the search region
+        frame_length (int): Frame size used to measure energy
+
+    Returns:
+        int: Sample index to cut at (end of the quietest frame)
+    """
+    region = audio[search_start:]
+    n_frames = len(region) // frame_length
+    if n_frames == 0:
+        return len(audio)
+    frames = region[:n_frames * frame_length].reshape(n_frames, frame_length)
+    energy = np.einsum("ij,ij->i", frames, frames)
+    return search_start + (int(np.argmin(energy)) + 1) * frame_length
+
+
 class AudioRecorder:
     """Handles native audio recording"""
 
-    def __init__(self, sample_rate=44100):
+    def __init__(self, sample_rate=DEFAULT_SAMPLE_RATE):
         self.sample_rate = sample_rate
         self.is_recording = False
-        self.recording_data = []
         self.stream = None
-
-    def start_recording(self):
-        """Start recording from the default microphone"""
+        self._buffer = None
+        self._frames = 0
+        self.consumed_frames = 0
+        self._on_window = None
+        self._window_frames = 0
+        self._watcher = None
+        self._stop_event = threading.Event()
+        # Guards _buffer and _frames between the capture callback and the window watcher
+        self._lock = threading.Lock()
+
+    def _allocate_buffer(self):
+        """Preallocate the capture buffer for a new recording"""
+        self._buffer = np.empty(INITIAL_BUFFER_SECONDS * self.sample_rate, dtype=np.float32)
+        self._frames = 0
+
+    def _open_stream(self, sample_rate):
+        """Open and start a mono float32 input stream at the given rate"""
+        stream = sd.InputStream(
+            samplerate=sample_rate,
+            channels=1,
+            dtype='float32',
+            callback=self._audio_callback
+        )
+        stream.start()
+        return stream
+
+    def _watch_windows(self):
+        """
+        Streaming mode: hand each finished window to the on_window callback
+
+        Windows are cut at the quietest point in their last few seconds so
+        words are not split between windows.
+        """
+        frame_length = int(WINDOW_FRAME_SECONDS * self.sample_rate)
+        search_length = int(WINDOW_SEARCH_SECONDS * self.sample_rate)
+        while not self._stop_event.wait(WINDOW_POLL_SECONDS):
+            # Copy the finished window out under the lock; the callback may swap in a grown buffer
+            with self._lock:
+                if self._buffer is None or self._frames - self.consumed_frames < self._window_frames:
+                    continue
+                pending = self._buffer[self.consumed_frames:self.consumed_frames + self._window_frames].copy()
+
+            search_start = max(0, len(pending) - search_length)
+            cut = find_quiet_cut(pending, search_start, frame_length)
+            window = pending[:cut]
+            self.consumed_frames += cut
+            try:
+                self._on_window(window)
+            except Exception as e:
+                logger.error(f"Streaming window callback failed: {e}")
+
+    def start_recording(self, on_window=None, window_seconds=30):
+        """
+        Start recording from the default microphone
+
+        Args:
+            on_window (callable): Streaming mode - called with each finished
+                window of audio (mono float32 at self.sample_rate) while recording
+            window_seconds (int): Maximum length of a streaming window
+        """
         if self.is_recording:
             logger.warning("Already recording")
             return False
 
         try:
             logger.info("Starting native audio recording")
-            self.recording_data = []
-            self.is_recording = True
 
             # Start recording with a callback that continuously captures audio
-            self.stream = sd.InputStream(
-                samplerate=self.sample_rate,
-                channels=1,
-                dtype='float32',
-                callback=self._audio_callback
-            )
-            self.stream.start()
+            try:
+                self._allocate_buffer()
+                self.is_recording = True
+                self.stream = self._open_stream(self.sample_rate)
+            except sd.PortAudioError as e:
+                if self.sample_rate == FALLBACK_SAMPLE_RATE:
+                    raise
+                logger.warning(
+                    f"Could not record at {self.sample_rate} Hz ({e}), "
+                    f"falling back to {FALLBACK_SAMPLE_RATE} Hz"
+                )
+                self.sample_rate = FALLBACK_SAMPLE_RATE
+                self._allocate_buffer()
+                self.stream = self._open_stream(self.sample_rate)
+
+            self.consumed_frames = 0
+            self._on_window = on_window
+            if on_window is not None:
+                self._window_frames = int(window_seconds * self.sample_rate)
+                self._stop_event.clear()
+                self._watcher = threading.Thread(
+                    target=self._watch_windows, name="recorder-windows", daemon=True
+                )
+                self._watcher.start()
 
             logger.info("Recording started successfully")
             return True
@@ -62,11 +170,23 @@ class AudioRecorder:
             logger.warning(f"Audio callback status: {status}")
 
         if self.is_recording:
-            # Append audio data to our buffer
-            self.recording_data.append(indata.copy())
-
-    def stop_recording(self):
-        """Stop recording and save to a temporary file"""
+            # Copy straight into the preallocated buffer, doubling it when full
+            with self._lock:
+                end = self._frames + frames
+                if end > len(self._buffer):
+                    grown = np.empty(max(end, 2 * len(self._buffer)), dtype=np.float32)
+                    grown[:self._frames] = self._buffer[:self._frames]
+                    self._buffer = grown
+                self._buffer[self._frames:end] = indata[:, 0]
+                self._frames = end
+
+    def stop_recording_audio(self):
+        """
+        Stop recording and return the captured audio
+
+        Returns:
+            np.ndarray: Mono float32 samples at self.sample_rate, or None on failure
+        """
         if not self.is_recording:
             logger.warning("Not currently recording")
             return None
@@ -81,12 +201,35 @@ class AudioRecorder:
                 self.stream.close()
                 self.stream = None
 
-            # Concatenate all recorded chunks
-            if not self.recording_data:
+            # Let the streaming watcher finish any window it is handing over
+            if self._watcher is not None:
+                self._stop_event.set()
+                self._watcher.join()
+                self._watcher = None
+
+            # Hand over the filled part of the buffer; the next recording allocates a new one
+            with self._lock:
+                recording = self._buffer[:self._frames] if self._frames else None
+                self._buffer = None
+                self._frames = 0
+
+            if recording is None:
                 logger.error("No audio data recorded")
                 return None
 
-            recording = np.concatenate(self.recording_data, axis=0)
+            logger.info(f"Recorded {len(recording) / self.sample_rate:.1f}s of audio")
+            return recording
+
+        except Exception as e:
+            logger.error(f"Failed to stop recording: {e}")
+            return None
+
+    def stop_recording(self):
+        """Stop recording and save to a temporary file"""
+        try:
+            recording = self.stop_recording_audio()
+            if recording is None:
+                return None
 
             # Create temporary file in uploads directory
             uploads_dir = Path("uploads")
@@ -122,10 +265,10 @@ def get_recorder():
     return _recorder
 
 
-def start_recording():
-    """Start recording audio"""
+def start_recording(on_window=None, window_seconds=30):
+    """Start recording audio, optionally streaming finished windows to on_window"""
     recorder = get_recorder()
-    return recorder.start_recording()
+    return recorder.start_recording(on_window=on_window, window_seconds=window_seconds)
 
 
 def stop_recording():
@@ -134,6 +277,18 @@ def stop_recording():
     return recorder.stop_recording()
 
 
+def stop_recording_audio():
+    """Stop recording and return (audio array, sample rate)"""
+    recorder = get_recorder()
+    return recorder.stop_recording_audio(), recorder.sample_rate
+
+
+def get_consumed_frames():
+    """Number of samples already handed to the streaming callback"""
+    recorder = get_recorder()
+    return recorder.consumed_frames
+
+
 def is_recording():
     """Check if currently recording"""
     recorder = get_recorder()
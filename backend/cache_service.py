@@ -0,0 +1,235 @@
+"""
+Cache Service for Reuters Caption Generator
+Bounded in-memory LRU cache with optional TTL and SQLite persistence
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+import weakref
+from collections import OrderedDict
+from dotenv import load_dotenv
+import metrics_service
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(
+    level=getattr(logging, os.getenv("LOG_LEVEL", "INFO")),
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+# Every live cache, reported on /api/metrics
+_caches = weakref.WeakSet()
+
+
+class ResultCache:
+    """
+    Two-tier cache for JSON-serializable results
+
+    The memory tier is an LRU capped at max_entries. When db_path is set,
+    entries are also written to a SQLite table so they survive restarts;
+    disk hits are promoted back into memory. The table is trimmed to
+    max_entries least recently used rows as well. Entries older than ttl
+    seconds are treated as misses and deleted (ttl=None keeps them until evicted).
+    """
+
+    def __init__(self, name, max_entries=128, ttl=None, db_path=None):
+        self.name = name
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.db_path = db_path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "disk_evictions": 0}
+        if db_path:
+            self._init_db()
+        _caches.add(self)
+
+    def _connect(self):
+        """Open a connection to the on-disk tier"""
+        return sqlite3.connect(self.db_path, timeout=5)
+
+    def _init_db(self):
+        """Create the on-disk table if it does not exist"""
+        try:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS cache "
+                    "(name TEXT, key TEXT, value TEXT, created REAL, accessed REAL, "
+                    "PRIMARY KEY (name, key))"
+                )
+                # Databases written before the disk tier was size-capped lack the access time
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(cache)")}
+                if "accessed" not in columns:
+                    conn.execute("ALTER TABLE cache ADD COLUMN accessed REAL")
+                    conn.execute("UPDATE cache SET accessed = created")
+                conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (name, accessed)")
+        except Exception as e:
+            logger.error(f"Error opening {self.name} cache database, disk tier disabled: {str(e)}")
+            self.db_path = None
+
+    def _expired(self, created):
+        """Check whether an entry created at the given time has expired"""
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def get(self, key):
+        """
+        Look up a cached value
+
+        Returns:
+            The cached value, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, created = entry
+                if not self._expired(created):
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return value
+                del self._entries[key]
+
+        if self.db_path:
+            value = self._get_from_disk(key)
+            if value is not None:
+                with self._lock:
+                    self._stats["disk_hits"] += 1
+                return value
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def _get_from_disk(self, key):
+        """Look up a value in the on-disk tier and promote it into memory"""
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT value, created FROM cache WHERE name = ? AND key = ?",
+                    (self.name, key),
+                ).fetchone()
+                if row is not None:
+                    if self._expired(row[1]):
+                        conn.execute("DELETE FROM cache WHERE name = ? AND key = ?", (self.name, key))
+                        row = None
+                    else:
+                        conn.execute(
+                            "UPDATE cache SET accessed = ? WHERE name = ? AND key = ?",
+                            (time.time(), self.name, key),
+                        )
+        except Exception as e:
+            logger.error(f"Error reading {self.name} cache database: {str(e)}")
+            return None
+
+        if row is None:
+            return None
+        value = json.loads(row[0])
+        self._store_in_memory(key, value, row[1])
+        return value
+
+    def set(self, key, value):
+        """Store a value in memory and, if enabled, on disk"""
+        created = time.time()
+        self._store_in_memory(key, value, created)
+        if self.db_path:
+            try:
+                with self._connect() as conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO cache (name, key, value, created, accessed) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (self.name, key, json.dumps(value), created, created),
+                    )
+                    self._trim_disk(conn)
+            except Exception as e:
+                logger.error(f"Error writing {self.name} cache database: {str(e)}")
+
+    def _trim_disk(self, conn):
+        """Delete expired rows, then the least recently used rows beyond max_entries"""
+        if self.ttl is not None:
+            conn.execute(
+                "DELETE FROM cache WHERE name = ? AND created < ?",
+                (self.name, time.time() - self.ttl),
+            )
+        evicted = conn.execute(
+            "DELETE FROM cache WHERE name = ? AND key NOT IN "
+            "(SELECT key FROM cache WHERE name = ? ORDER BY accessed DESC LIMIT ?)",
+            (self.name, self.name, self.max_entries),
+        ).rowcount
+        if evicted > 0:
+            with self._lock:
+                self._stats["disk_evictions"] += evicted
+
+    def _store_in_memory(self, key, value, created):
+        """Insert into the LRU, evicting the least recently used entries"""
+        with self._lock:
+            self._entries[key] = (value, created)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self):
+        """Drop every entry from both tiers"""
+        with self._lock:
+            self._entries.clear()
+        if self.db_path:
+            try:
+                with self._connect() as conn:
+                    conn.execute("DELETE FROM cache WHERE name = ?", (self.name,))
+            except Exception as e:
+                logger.error(f"Error clearing {self.name} cache database: {str(e)}")
+
+    def stats(self):
+        """Report hit/miss counters and current size"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        stats["max_entries"] = self.max_entries
+        stats["persistent"] = bool(self.db_path)
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["hits"] + stats["disk_hits"]) / lookups, 3) if lookups else 0.0
+        return stats
+
+
+def _collect_metrics():
+    """Report hit/miss counters and sizes of every cache on /api/metrics"""
+    lookups = metrics_service.Counter(
+        "caption_cache_lookups_total",
+        "Cache lookups by cache and result (hit, disk_hit, miss)",
+        ["cache", "result"],
+    )
+    evictions = metrics_service.Counter(
+        "caption_cache_evictions_total",
+        "Entries evicted from the memory tier",
+        ["cache"],
+    )
+    disk_evictions = metrics_service.Counter(
+        "caption_cache_disk_evictions_total",
+        "Expired and least recently used rows deleted from the disk tier",
+        ["cache"],
+    )
+    entries = metrics_service.Gauge(
+        "caption_cache_entries",
+        "Entries in the memory tier",
+        ["cache"],
+    )
+    for cache in list(_caches):
+        stats = cache.stats()
+        for result, key in (("hit", "hits"), ("disk_hit", "disk_hits"), ("miss", "misses")):
+            lookups.inc(stats[key], (cache.name, result))
+        evictions.inc(stats["evictions"], (cache.name,))
+        disk_evictions.inc(stats["disk_evictions"], (cache.name,))
+        entries.set(stats["entries"], (cache.name,))
+    return [lookups, evictions, disk_evictions, entries]
+
+
+metrics_service.register_collector(_collect_metrics)
@@ -4,9 +4,19 @@ Handles integration with Claude via LiteLLM for caption generation
 """
 
 import os
+import re
+import time
+import asyncio
+import uuid
+import hashlib
 import logging
+import threading
+from collections import OrderedDict
+import httpx2
 from dotenv import load_dotenv
-from anthropic import Anthropic
+from anthropic import Anthropic, AsyncAnthropic, DefaultHttpxClient, DefaultAsyncHttpxClient
+from cache_service import ResultCache
+import metrics_service
 
 # Load environment variables
 load_dotenv()
@@ -22,11 +32,60 @@ logger = logging.getLogger(__name__)
 LITELLM_API_KEY = os.getenv("LITELLM_API_KEY")
 LITELLM_API_URL = os.getenv("LITELLM_API_URL")
 
+# HTTP connection pool shared by every caption request
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", 10))
+LLM_KEEPALIVE_SECONDS = float(os.getenv("LLM_KEEPALIVE_SECONDS", 60))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", 5))
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", 60))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 2))
+
+# Async caption engine: LLM calls share one event loop and connection pool
+LLM_ASYNC = os.getenv("LLM_ASYNC", "True").lower() == "true"
+LLM_ASYNC_POOL_SIZE = int(os.getenv("LLM_ASYNC_POOL_SIZE", 100))
+
+# Rate limit for LLM calls, matched to the LiteLLM quota (0 = unlimited)
+LLM_RATE_LIMIT_PER_MINUTE = float(os.getenv("LLM_RATE_LIMIT_PER_MINUTE", 0))
+LLM_RATE_LIMIT_BURST = int(os.getenv("LLM_RATE_LIMIT_BURST", 5))
+
+# Batch captioning: concurrent LLM calls shared by all batch requests, and max items per batch
+CAPTION_BATCH_CONCURRENCY = int(os.getenv("CAPTION_BATCH_CONCURRENCY", 4))
+CAPTION_BATCH_MAX_ITEMS = int(os.getenv("CAPTION_BATCH_MAX_ITEMS", 100))
+
 # Claude model configuration
 MODEL = "claude-sonnet-4-5"
+MAX_TOKENS = 1000
+# Sent in the request body: the Anthropic SDK 1.x create() no longer takes temperature
+TEMPERATURE = 0.1
+
+# Caption cache: identical requests within the TTL reuse the previous caption
+CAPTION_CACHE = os.getenv("CAPTION_CACHE", "True").lower() == "true"
+CAPTION_CACHE_SIZE = int(os.getenv("CAPTION_CACHE_SIZE", 256))
+CAPTION_CACHE_TTL = int(os.getenv("CAPTION_CACHE_TTL", 3600))
+# Optional SQLite file for a cache that survives restarts (empty = memory only)
+CAPTION_CACHE_DB = os.getenv("CAPTION_CACHE_DB", "")
+
+_caption_cache = ResultCache(
+    "caption",
+    max_entries=CAPTION_CACHE_SIZE,
+    ttl=CAPTION_CACHE_TTL,
+    db_path=CAPTION_CACHE_DB or None,
+)
+
+# Refinement sessions: idle expiry, maximum live sessions, and the number of
+# follow-up rounds kept verbatim before the history is folded into one turn
+SESSION_TTL = int(os.getenv("SESSION_TTL", 1800))
+SESSION_MAX = int(os.getenv("SESSION_MAX", 200))
+SESSION_MAX_TURNS = int(os.getenv("SESSION_MAX_TURNS", 10))
+
+# Returned instead of a caption when the transcription is empty
+NO_SPEECH_MESSAGE = "No speech was detected in the recording. Can you record your description again?"
 
-# Reuters caption prompt template
-REUTERS_PROMPT_TEMPLATE = """# Reuters Photo Caption Formatter
+# Short role statement sent ahead of the style guide
+SYSTEM_PROMPT = "You are a Reuters photo caption formatter assistant."
+
+# Static Reuters style guide, sent as a cached system prompt block.
+# Keep anything request-specific out of it so the cached prefix stays identical.
+REUTERS_STYLE_GUIDE = """# Reuters Photo Caption Formatter
 
 You are a Reuters photo caption formatter. Your sole purpose is to convert improperly formatted photo captions into proper Reuters style format using ONLY the information provided in the input caption. You must NEVER fabricate, assume, or add information that is not explicitly stated.
 
@@ -96,7 +155,17 @@ When I provide you with an improperly formatted photo caption:
 2. **Identify missing information** required for a complete Reuters caption
 3. **Never add information** that wasn't in the original caption
 
-## PHOTOGRAPHER'S SPOKEN DESCRIPTION:
+## CRITICAL RULES
+- Use ONLY information from the provided caption
+- Never fabricate names, dates, locations, or context
+- If essential information is missing, clearly state what's needed
+- Maintain journalistic integrity and Reuters standards at all times
+- When in doubt, ask for clarification rather than assume
+- Follow the exact formatting patterns shown in the reference examples above
+"""
+
+# Per-request part of the prompt: the transcription and the output format
+REUTERS_USER_TEMPLATE = """## PHOTOGRAPHER'S SPOKEN DESCRIPTION:
 {transcription}
 
 ## OUTPUT FORMAT
@@ -112,116 +181,812 @@ IMPORTANT: Do not use any markdown formatting (no **, no *, no #, etc.). Use pla
 - [Example: "Can you provide the specific location?" instead of "Location details"]
 - [Example: "When was this photograph taken?" instead of "Date"]
 - [Informational notes like "No additional material needed" can remain as statements]
+"""
 
-## CRITICAL RULES
-- Use ONLY information from the provided caption
-- Never fabricate names, dates, locations, or context
-- If essential information is missing, clearly state what's needed
-- Maintain journalistic integrity and Reuters standards at all times
-- When in doubt, ask for clarification rather than assume
-- Follow the exact formatting patterns shown in the reference examples above
+# Follow-up turn in a refinement session: only the new detail is sent
+REUTERS_REFINE_TEMPLATE = """## ADDITIONAL DETAILS FROM THE PHOTOGRAPHER:
+{details}
+
+Update the Reuters formatted caption using all of the information provided so far, and list only the information that is still missing. Use exactly the same output format as before, in plain text.
 """
 
 
-def generate_caption(transcription):
+def build_system_blocks():
+    """
+    Build the system prompt with the style guide marked for prompt caching
+
+    Returns:
+        list: System content blocks; everything up to the cache_control
+            breakpoint is reused across requests by the prompt cache
+    """
+    return [
+        {"type": "text", "text": SYSTEM_PROMPT},
+        {
+            "type": "text",
+            "text": REUTERS_STYLE_GUIDE,
+            "cache_control": {"type": "ephemeral"},
+        },
+    ]
+
+
+@metrics_service.timed("prompt_build")
+def build_user_prompt(transcription):
+    """Build the per-request user message for a transcription"""
+    return REUTERS_USER_TEMPLATE.format(transcription=transcription)
+
+
+def extract_usage(message):
+    """
+    Pull token usage, including prompt cache reads and writes, off a response
+
+    Returns:
+        dict: input, output, cache read and cache write token counts
+    """
+    usage = getattr(message, "usage", None)
+    return {
+        "input_tokens": getattr(usage, "input_tokens", 0) or 0,
+        "output_tokens": getattr(usage, "output_tokens", 0) or 0,
+        "cache_read_input_tokens": getattr(usage, "cache_read_input_tokens", 0) or 0,
+        "cache_creation_input_tokens": getattr(usage, "cache_creation_input_tokens", 0) or 0,
+    }
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter
+
+    Holds up to `capacity` tokens, refilled at `rate` tokens per second;
+    acquire() blocks until a token is available. A rate of 0 disables limiting.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until one is available"""
+        if self.rate <= 0:
+            return
+        while True:
+            wait = self._try_take()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    def _try_take(self):
+        """Take a token if one is available; returns seconds to wait otherwise"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    async def acquire_async(self):
+        """Take one token without blocking the event loop"""
+        if self.rate <= 0:
+            return
+        while True:
+            wait = self._try_take()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+
+_rate_limiter = TokenBucket(LLM_RATE_LIMIT_PER_MINUTE / 60, LLM_RATE_LIMIT_BURST)
+
+# Shared event loop for the async caption engine, started on first use.
+# The async client and batch semaphore belong to this loop and are only
+# touched from its thread.
+_loop = None
+_loop_lock = threading.Lock()
+_async_client = None
+_async_client_config = None
+_batch_semaphore = None
+
+
+# Long-lived client, rebuilt when its configuration changes
+_client = None
+_client_config = None
+_client_lock = threading.Lock()
+
+
+def _current_client_config():
+    """Snapshot of the settings the shared client is built from"""
+    return (
+        LITELLM_API_KEY,
+        LITELLM_API_URL,
+        LLM_POOL_SIZE,
+        LLM_KEEPALIVE_SECONDS,
+        LLM_CONNECT_TIMEOUT,
+        LLM_READ_TIMEOUT,
+        LLM_MAX_RETRIES,
+    )
+
+
+def get_client():
+    """
+    Get the shared Anthropic client, building it on first use
+
+    The client keeps a pool of keep-alive connections to the LiteLLM proxy so
+    requests skip the TCP and TLS handshake. If any setting in
+    _current_client_config() has changed, a new client is built; the old one
+    is not closed here so in-flight requests on it can finish.
+
+    Returns:
+        Anthropic: The pooled client
+    """
+    global _client, _client_config
+    config = _current_client_config()
+    if _client is not None and _client_config == config:
+        return _client
+
+    with _client_lock:
+        if _client is None or _client_config != config:
+            logger.info(f"Creating pooled Anthropic client (pool size {LLM_POOL_SIZE})")
+            http_client = DefaultHttpxClient(
+                limits=httpx2.Limits(
+                    max_connections=LLM_POOL_SIZE,
+                    max_keepalive_connections=LLM_POOL_SIZE,
+                    keepalive_expiry=LLM_KEEPALIVE_SECONDS,
+                ),
+                timeout=httpx2.Timeout(LLM_READ_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+            )
+            _client = Anthropic(
+                api_key=LITELLM_API_KEY,
+                base_url=LITELLM_API_URL,
+                http_client=http_client,
+                timeout=httpx2.Timeout(LLM_READ_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+                max_retries=LLM_MAX_RETRIES,
+            )
+            _client_config = config
+    return _client
+
+
+def get_event_loop():
+    """Get the shared asyncio loop, starting its thread on first use"""
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="caption-loop", daemon=True)
+                thread.start()
+                _loop = loop
+    return _loop
+
+
+def run_coroutine(coro, timeout=None):
+    """
+    Run a coroutine on the shared loop from synchronous code
+
+    Lets Flask request threads and the pywebview API call into the async
+    engine; the calling thread waits while the loop multiplexes every
+    in-flight LLM call over one connection pool.
+
+    Returns:
+        The coroutine's result
+    """
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result(timeout)
+
+
+def get_async_client():
+    """
+    Get the shared AsyncAnthropic client; must be called on the shared loop
+
+    Rebuilt when the client configuration changes, like get_client().
+
+    Returns:
+        AsyncAnthropic: The pooled async client
+    """
+    global _async_client, _async_client_config
+    config = _current_client_config() + (LLM_ASYNC_POOL_SIZE,)
+    if _async_client is None or _async_client_config != config:
+        logger.info(f"Creating pooled async Anthropic client (pool size {LLM_ASYNC_POOL_SIZE})")
+        http_client = DefaultAsyncHttpxClient(
+            limits=httpx2.Limits(
+                max_connections=LLM_ASYNC_POOL_SIZE,
+                max_keepalive_connections=LLM_ASYNC_POOL_SIZE,
+                keepalive_expiry=LLM_KEEPALIVE_SECONDS,
+            ),
+            timeout=httpx2.Timeout(LLM_READ_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+        )
+        _async_client = AsyncAnthropic(
+            api_key=LITELLM_API_KEY,
+            base_url=LITELLM_API_URL,
+            http_client=http_client,
+            timeout=httpx2.Timeout(LLM_READ_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+            max_retries=LLM_MAX_RETRIES,
+        )
+        _async_client_config = config
+    return _async_client
+
+
+def caption_cache_key(transcription):
+    """
+    Build the cache key for a caption request
+
+    Args:
+        transcription (str): Transcribed text from the audio
+
+    Returns:
+        str: SHA-256 of the whitespace-normalized transcription, model,
+            temperature and prompt text
+    """
+    normalized = re.sub(r"\s+", " ", transcription).strip()
+    prompt = SYSTEM_PROMPT + REUTERS_STYLE_GUIDE + REUTERS_USER_TEMPLATE
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    key = f"{MODEL}|{TEMPERATURE}|{MAX_TOKENS}|{prompt_hash}|{normalized}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def get_cache_stats():
+    """Report caption cache hit/miss counters"""
+    return _caption_cache.stats()
+
+
+def create_message(messages):
+    """
+    Send a conversation to Claude with the cached Reuters system prompt
+
+    Args:
+        messages (list): Anthropic-style message dicts
+
+    Returns:
+        tuple: (assistant text, token usage dict)
+    """
+    # Respect the LiteLLM quota, then reuse the pooled client
+    _rate_limiter.acquire()
+    with metrics_service.timer("llm_request"):
+        message = get_client().messages.create(
+            model=MODEL,
+            max_tokens=MAX_TOKENS,
+            extra_body={"temperature": TEMPERATURE},
+            system=build_system_blocks(),
+            messages=messages
+        )
+    usage = extract_usage(message)
+    metrics_service.record_llm_usage(usage)
+    logger.info(f"Token usage: {usage}")
+
+    # Extract the assistant's message
+    assistant_message = message.content[0].text
+    logger.info(f"Raw Claude response:\n{assistant_message}")
+    return assistant_message, usage
+
+
+def _precheck_caption(transcription, use_cache):
+    """
+    Handle requests that need no model call
+
+    Returns:
+        tuple: (result, cache_key) - result is set for empty transcriptions
+            and cache hits; cache_key is set when the result should be cached
+    """
+    # Nothing to caption - skip the LLM call entirely
+    if not transcription or not transcription.strip():
+        logger.info("Empty transcription, skipping caption generation")
+        return {
+            "formatted_caption": "",
+            "missing_information": [NO_SPEECH_MESSAGE],
+            "speech_detected": False,
+        }, None
+
+    # Reuse the caption for an identical request
+    if not CAPTION_CACHE:
+        return None, None
+    cache_key = caption_cache_key(transcription)
+    if use_cache:
+        cached = _caption_cache.get(cache_key)
+        if cached is not None:
+            logger.info("Caption cache hit")
+            return dict(cached, cached=True), cache_key
+    return None, cache_key
+
+
+def _finish_caption(assistant_message, usage, cache_key):
+    """Parse a model response into sections and cache them"""
+    # Parse the response to extract the different sections
+    sections = parse_claude_response(assistant_message)
+    logger.info(f"Parsed sections: {sections}")
+
+    if cache_key is not None:
+        _caption_cache.set(cache_key, sections)
+
+    logger.info("Caption generated successfully")
+    return dict(sections, usage=usage)
+
+
+def generate_caption(transcription, use_cache=True):
     """
     Generate a Reuters-style caption using Claude via LiteLLM
 
     Args:
         transcription (str): Transcribed text from the audio
+        use_cache (bool): Set to False to bypass the caption cache
 
     Returns:
         dict: Dictionary containing the formatted caption, missing information, and follow-up questions
     """
     try:
-        logger.info("Generating caption with Claude via LiteLLM")
+        result, cache_key = _precheck_caption(transcription, use_cache)
+        if result is not None:
+            return result
 
-        # Prepare the prompt with the transcription
-        prompt = REUTERS_PROMPT_TEMPLATE.format(transcription=transcription)
+        logger.info("Generating caption with Claude via LiteLLM")
 
-        # Initialize Anthropic client with custom base URL for LiteLLM
-        client = Anthropic(
-            api_key=LITELLM_API_KEY,
-            base_url=LITELLM_API_URL
-        )
+        # Only the transcription varies; the style guide is a cached system block
+        prompt = build_user_prompt(transcription)
 
         # Call Claude via LiteLLM
-        message = client.messages.create(
+        assistant_message, usage = create_message([
+            {"role": "user", "content": prompt}
+        ])
+
+        return _finish_caption(assistant_message, usage, cache_key)
+
+    except Exception as e:
+        logger.error(f"Error generating caption: {str(e)}")
+        metrics_service.record_error("caption", e)
+        raise
+
+
+async def create_message_async(messages):
+    """
+    Async version of create_message; must run on the shared loop
+
+    Returns:
+        tuple: (assistant text, token usage dict)
+    """
+    await _rate_limiter.acquire_async()
+    with metrics_service.timer("llm_request"):
+        message = await get_async_client().messages.create(
             model=MODEL,
-            max_tokens=1000,
-            temperature=0.1,
-            system="You are a Reuters photo caption formatter assistant.",
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
+            max_tokens=MAX_TOKENS,
+            extra_body={"temperature": TEMPERATURE},
+            system=build_system_blocks(),
+            messages=messages
         )
+    usage = extract_usage(message)
+    metrics_service.record_llm_usage(usage)
+    logger.info(f"Token usage: {usage}")
+
+    assistant_message = message.content[0].text
+    logger.info(f"Raw Claude response:\n{assistant_message}")
+    return assistant_message, usage
+
+
+async def generate_caption_async(transcription, use_cache=True):
+    """
+    Async version of generate_caption; must run on the shared loop
 
-        # Extract the assistant's message
-        assistant_message = message.content[0].text
-        logger.info(f"Raw Claude response:\n{assistant_message}")
+    From synchronous code use run_coroutine(generate_caption_async(...)).
 
-        # Parse the response to extract the different sections
-        sections = parse_claude_response(assistant_message)
-        logger.info(f"Parsed sections: {sections}")
+    Args:
+        transcription (str): Transcribed text from the audio
+        use_cache (bool): Set to False to bypass the caption cache
 
-        logger.info("Caption generated successfully")
-        return sections
+    Returns:
+        dict: Dictionary containing the formatted caption and missing information
+    """
+    try:
+        result, cache_key = _precheck_caption(transcription, use_cache)
+        if result is not None:
+            return result
+
+        logger.info("Generating caption with Claude via LiteLLM (async)")
+        assistant_message, usage = await create_message_async([
+            {"role": "user", "content": build_user_prompt(transcription)}
+        ])
+        return _finish_caption(assistant_message, usage, cache_key)
 
     except Exception as e:
         logger.error(f"Error generating caption: {str(e)}")
+        metrics_service.record_error("caption", e)
         raise
 
 
-def parse_claude_response(response_text):
+async def generate_captions_batch_async(transcriptions, use_cache=True):
     """
-    Parse Claude's response to extract the formatted caption, changes made, missing information, and keywords
+    Generate captions for several transcriptions concurrently on the shared loop
+
+    At most CAPTION_BATCH_CONCURRENCY calls run at once across all batches,
+    and every model call passes through the LLM rate limiter.
 
     Args:
-        response_text (str): Claude's response text
+        transcriptions (list): Transcribed texts
+        use_cache (bool): Set to False to bypass the caption cache
 
     Returns:
-        dict: Dictionary containing the parsed sections
+        list: One result per input, in input order; failed items carry an
+            "error" key instead of caption sections
     """
-    # Initialize the sections
-    sections = {
-        "formatted_caption": "",
-        "missing_information": []
-    }
+    global _batch_semaphore
+    if _batch_semaphore is None:
+        _batch_semaphore = asyncio.Semaphore(max(1, CAPTION_BATCH_CONCURRENCY))
+
+    async def caption_one(transcription):
+        async with _batch_semaphore:
+            return await generate_caption_async(transcription, use_cache)
 
-    # Split the response by sections
-    lines = response_text.strip().split("\n")
-    current_section = None
+    logger.info(f"Generating batch of {len(transcriptions)} captions")
+    outcomes = await asyncio.gather(
+        *(caption_one(transcription) for transcription in transcriptions),
+        return_exceptions=True,
+    )
 
-    for line in lines:
+    results = []
+    for index, outcome in enumerate(outcomes):
+        if isinstance(outcome, Exception):
+            results.append({"index": index, "error": str(outcome)})
+        else:
+            results.append(dict(outcome, index=index))
+    return results
+
+
+def generate_captions_batch(transcriptions, use_cache=True):
+    """Synchronous wrapper around generate_captions_batch_async"""
+    return run_coroutine(generate_captions_batch_async(transcriptions, use_cache))
+
+
+class SessionNotFoundError(Exception):
+    """Raised when a refinement session does not exist or has expired"""
+
+
+class CaptionSession:
+    """
+    Server-side state for one caption refinement conversation
+
+    Holds the original transcript, every follow-up detail and the message
+    history, so each refinement round only sends the new detail from the
+    client instead of the whole growing transcript.
+    """
+
+    def __init__(self, transcription):
+        self.id = uuid.uuid4().hex
+        self.transcription = transcription
+        self.details = []
+        # Refinement rounds since the history was last compacted
+        self.turns = 0
+        self.messages = []
+        self.sections = None
+        self.last_used = time.time()
+        self.lock = threading.Lock()
+
+    def to_dict(self):
+        """Serialize the session's current caption for the API"""
+        return dict(self.sections or {}, session_id=self.id, rounds=len(self.details))
+
+    def request_messages(self):
+        """
+        Message history to send, with the newest user turn marked for prompt
+        caching so the next round reads the whole conversation from cache
+        """
+        messages = [dict(message) for message in self.messages]
+        last = messages[-1]
+        last["content"] = [{
+            "type": "text",
+            "text": last["content"],
+            "cache_control": {"type": "ephemeral"},
+        }]
+        return messages
+
+    def compact(self):
+        """Fold the history into a single turn once SESSION_MAX_TURNS rounds have built up"""
+        combined = self.transcription + "".join(
+            f"\n\nAdditional details: {detail}" for detail in self.details
+        )
+        self.messages = [
+            {"role": "user", "content": build_user_prompt(combined)},
+            self.messages[-1],
+        ]
+        self.turns = 0
+
+
+def format_sections(sections):
+    """Render parsed sections back into the model's output format"""
+    lines = ["REUTERS FORMATTED CAPTION:", sections.get("formatted_caption", ""), "",
+             "MISSING INFORMATION NEEDED:"]
+    lines.extend(f"- {item}" for item in sections.get("missing_information", []))
+    return "\n".join(lines)
+
+
+# Refinement sessions, least recently used first
+_sessions = OrderedDict()
+_sessions_lock = threading.Lock()
+
+
+def _purge_sessions():
+    """Drop expired sessions and evict the oldest beyond SESSION_MAX"""
+    cutoff = time.time() - SESSION_TTL
+    with _sessions_lock:
+        for session_id in [sid for sid, session in _sessions.items() if session.last_used < cutoff]:
+            del _sessions[session_id]
+        while len(_sessions) > SESSION_MAX:
+            _sessions.popitem(last=False)
+
+
+def get_session(session_id):
+    """
+    Look up a live session and mark it as recently used
+
+    Raises:
+        SessionNotFoundError: If the session does not exist or has expired
+    """
+    _purge_sessions()
+    with _sessions_lock:
+        session = _sessions.get(session_id)
+        if session is None:
+            raise SessionNotFoundError(f"Session {session_id} not found or expired")
+        session.last_used = time.time()
+        _sessions.move_to_end(session_id)
+        return session
+
+
+def create_session(transcription, sections=None):
+    """
+    Start a refinement session
+
+    Args:
+        transcription (str): Original transcribed text
+        sections (dict): Optional caption already generated for this
+            transcription; when given, the session is seeded with it and no
+            model call is made
+
+    Returns:
+        dict: The session's caption sections plus session_id
+    """
+    session = CaptionSession(transcription)
+    prompt = build_user_prompt(transcription)
+
+    # Nothing to caption - seed the session with the no-speech result instead of calling the model
+    if sections is None and (not transcription or not transcription.strip()):
+        logger.info("Empty transcription, starting refinement session without a model call")
+        sections = {
+            "formatted_caption": "",
+            "missing_information": [NO_SPEECH_MESSAGE],
+            "speech_detected": False,
+        }
+
+    if sections is None:
+        logger.info("Generating caption for new refinement session")
+        response_text, usage = create_message([{"role": "user", "content": prompt}])
+        sections = dict(parse_claude_response(response_text), usage=usage)
+    else:
+        response_text = format_sections(sections)
+
+    session.messages = [
+        {"role": "user", "content": prompt},
+        {"role": "assistant", "content": response_text},
+    ]
+    session.sections = sections
+
+    with _sessions_lock:
+        _sessions[session.id] = session
+    _purge_sessions()
+    logger.info(f"Created refinement session {session.id}")
+    return session.to_dict()
+
+
+def refine_session(session_id, details):
+    """
+    Add a detail to a session and regenerate its caption
+
+    Only the new detail is sent as a follow-up turn; the style guide and
+    earlier turns come from the prompt cache.
+
+    Args:
+        session_id (str): Session to refine
+        details (str): New information from the photographer
+
+    Raises:
+        SessionNotFoundError: If the session does not exist or has expired
+
+    Returns:
+        dict: Updated caption sections plus session_id
+    """
+    session = get_session(session_id)
+    with session.lock:
+        if session.turns >= SESSION_MAX_TURNS:
+            session.compact()
+
+        session.messages.append({
+            "role": "user",
+            "content": REUTERS_REFINE_TEMPLATE.format(details=details),
+        })
+        try:
+            response_text, usage = create_message(session.request_messages())
+        except Exception as e:
+            session.messages.pop()
+            metrics_service.record_error("refine", e)
+            raise
+
+        session.details.append(details)
+        session.turns += 1
+        session.messages.append({"role": "assistant", "content": response_text})
+        session.sections = dict(parse_claude_response(response_text), usage=usage)
+        session.last_used = time.time()
+        logger.info(f"Refined session {session.id} (round {len(session.details)})")
+        return session.to_dict()
+
+
+def generate_caption_stream(transcription, use_cache=True):
+    """
+    Generate a Reuters-style caption, yielding sections as the model writes them
+
+    Args:
+        transcription (str): Transcribed text from the audio
+        use_cache (bool): Set to False to bypass the caption cache
+
+    Yields:
+        tuple: ("formatted_caption", str), then ("missing_information", str)
+            per item, and finally ("done", dict) with the full result
+    """
+    # Empty and cached requests have nothing to stream
+    result, cache_key = _precheck_caption(transcription, use_cache)
+    if result is not None:
+        yield from _replay_sections(result)
+        return
+
+    try:
+        logger.info("Streaming caption from Claude via LiteLLM")
+        parser = CaptionStreamParser()
+        _rate_limiter.acquire()
+        started = time.perf_counter()
+
+        with get_client().messages.stream(
+            model=MODEL,
+            max_tokens=MAX_TOKENS,
+            extra_body={"temperature": TEMPERATURE},
+            system=build_system_blocks(),
+            messages=[
+                {"role": "user", "content": build_user_prompt(transcription)}
+            ]
+        ) as stream:
+            for text in stream.text_stream:
+                yield from parser.feed(text)
+            message = stream.get_final_message()
+        metrics_service.observe_stage("llm_request", time.perf_counter() - started)
+
+        yield from parser.close()
+        usage = extract_usage(message)
+        metrics_service.record_llm_usage(usage)
+        logger.info(f"Token usage: {usage}")
+
+        sections = parser.sections
+        if cache_key is not None:
+            _caption_cache.set(cache_key, sections)
+
+        logger.info("Caption streamed successfully")
+        yield ("done", dict(sections, usage=usage))
+
+    except Exception as e:
+        logger.error(f"Error streaming caption: {str(e)}")
+        metrics_service.record_error("caption", e)
+        raise
+
+
+def _replay_sections(result):
+    """Yield a finished caption result as stream events"""
+    if result["formatted_caption"]:
+        yield ("formatted_caption", result["formatted_caption"])
+    for item in result["missing_information"]:
+        yield ("missing_information", item)
+    yield ("done", result)
+
+
+class CaptionStreamParser:
+    """
+    Incremental version of parse_claude_response
+
+    Feed text deltas as they arrive from the model. Each call returns the
+    events that became available: ("formatted_caption", text) once the
+    caption section is closed by the next header, and
+    ("missing_information", item) for each list item once its line ends.
+    """
+
+    def __init__(self):
+        self.sections = {
+            "formatted_caption": "",
+            "missing_information": []
+        }
+        self._buffer = ""
+        self._current_section = None
+        self._caption_emitted = False
+
+    def feed(self, text):
+        """
+        Add a chunk of response text
+
+        Returns:
+            list: (event, value) tuples for sections completed by this chunk
+        """
+        self._buffer += text
+        events = []
+        while "\n" in self._buffer:
+            line, self._buffer = self._buffer.split("\n", 1)
+            events.extend(self._process_line(line))
+        return events
+
+    def close(self):
+        """
+        Flush the last partial line at the end of the response
+
+        Returns:
+            list: Remaining (event, value) tuples, including the caption if
+                no later header closed its section
+        """
+        events = []
+        if self._buffer:
+            line, self._buffer = self._buffer, ""
+            events.extend(self._process_line(line))
+        events.extend(self._emit_caption())
+        return events
+
+    def _emit_caption(self):
+        """Emit the caption once, when its section is finished"""
+        if self._caption_emitted or not self.sections["formatted_caption"]:
+            return []
+        self._caption_emitted = True
+        return [("formatted_caption", self.sections["formatted_caption"])]
+
+    def _process_line(self, line):
+        """Classify one complete line and return any events it completes"""
         line = line.strip()
 
         # Skip empty lines
         if not line:
-            continue
+            return []
 
         # Check for section headers
-        if "REUTERS FORMATTED CAPTION" in line.upper():
-            current_section = "formatted_caption"
-            continue
-        elif "MISSING INFORMATION" in line.upper():
-            current_section = "missing_information"
-            continue
-        elif "CHANGES MADE" in line.upper() or "KEYWORDS" in line.upper():
+        upper = line.upper()
+        if "REUTERS FORMATTED CAPTION" in upper:
+            self._current_section = "formatted_caption"
+            return []
+        elif "MISSING INFORMATION" in upper:
+            self._current_section = "missing_information"
+            return self._emit_caption()
+        elif "CHANGES MADE" in upper or "KEYWORDS" in upper:
             # Skip these sections if they appear (we don't want them)
-            current_section = None
-            continue
+            self._current_section = None
+            return self._emit_caption()
 
         # Add content to the current section
-        if current_section == "formatted_caption":
-            if sections["formatted_caption"]:
-                sections["formatted_caption"] += "\n"
-            sections["formatted_caption"] += line
-        elif current_section == "missing_information":
+        if self._current_section == "formatted_caption":
+            if self.sections["formatted_caption"]:
+                self.sections["formatted_caption"] += "\n"
+            self.sections["formatted_caption"] += line
+        elif self._current_section == "missing_information":
             # Handle both dash-prefixed and numbered list items
+            item = None
             if line.startswith("-"):
-                sections["missing_information"].append(line[1:].strip())
+                item = line[1:].strip()
             elif line[0].isdigit() and "." in line:
                 # Handle numbered items like "1. item"
-                sections["missing_information"].append(line.split(".", 1)[1].strip())
+                item = line.split(".", 1)[1].strip()
+            if item is not None:
+                self.sections["missing_information"].append(item)
+                return [("missing_information", item)]
+        return []
+
+
+@metrics_service.timed("response_parse")
+def parse_claude_response(response_text):
+    """
+    Parse Claude's response to extract the formatted caption, changes made, missing information, and keywords
 
-    return sections
+    Args:
+        response_text (str): Claude's response text
+
+    Returns:
+        dict: Dictionary containing the parsed sections
+    """
+    parser = CaptionStreamParser()
+    parser.feed(response_text.strip())
+    parser.close()
+    return parser.sections
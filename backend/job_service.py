@@ -0,0 +1,365 @@
+"""
+Job Service for Reuters Caption Generator
+Runs transcription work on a fixed-size worker pool with a bounded queue
+"""
+
+import os
+import json
+import time
+import uuid
+import queue
+import socket
+import logging
+import ipaddress
+import threading
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+import metrics_service
+import profiling_service
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(
+    level=getattr(logging, os.getenv("LOG_LEVEL", "INFO")),
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+# Number of worker threads running inference concurrently
+TRANSCRIBE_WORKERS = int(os.getenv("TRANSCRIBE_WORKERS", 1))
+
+# Number of jobs allowed to wait for a worker before new jobs are rejected
+TRANSCRIBE_QUEUE_SIZE = int(os.getenv("TRANSCRIBE_QUEUE_SIZE", 16))
+
+# How long finished jobs are kept for polling (seconds)
+JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", 600))
+
+# Timeout for delivering job results to a callback URL (seconds)
+JOB_CALLBACK_TIMEOUT = 5
+
+# Threads delivering callbacks, so a slow callback URL never holds up a worker
+JOB_CALLBACK_WORKERS = 2
+
+# Threads running jobs' follow-up steps (e.g. an LLM call after a transcription)
+JOB_FOLLOWUP_WORKERS = 4
+
+# Hosts allowed to receive job callbacks (comma-separated). When empty, any public
+# host is allowed, but private, loopback and link-local addresses are rejected
+JOB_CALLBACK_ALLOWED_HOSTS = {
+    host.strip().lower()
+    for host in os.getenv("JOB_CALLBACK_ALLOWED_HOSTS", "").split(",")
+    if host.strip()
+}
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue has no room for another job"""
+
+
+class InvalidCallbackError(ValueError):
+    """Raised when a callback URL is not allowed to receive job results"""
+
+
+def validate_callback_url(url):
+    """
+    Check that a callback URL may receive job results
+
+    Only http and https are accepted. Hosts in JOB_CALLBACK_ALLOWED_HOSTS are
+    always allowed; without an allowlist, hosts resolving to private,
+    loopback, link-local or reserved addresses are rejected.
+
+    Args:
+        url (str): Callback URL supplied by the client
+
+    Raises:
+        InvalidCallbackError: If the URL is not allowed
+    """
+    parsed = urllib.parse.urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise InvalidCallbackError("Callback URL must be an http or https URL")
+    host = parsed.hostname.lower()
+
+    if JOB_CALLBACK_ALLOWED_HOSTS:
+        if host not in JOB_CALLBACK_ALLOWED_HOSTS:
+            raise InvalidCallbackError(f"Callback host not allowed: {host}")
+        return
+
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, parsed.port or None)}
+    except (socket.gaierror, ValueError) as e:
+        raise InvalidCallbackError(f"Cannot resolve callback host: {host}") from e
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split("%")[0])
+        if not ip.is_global or ip.is_multicast:
+            raise InvalidCallbackError(f"Callback host resolves to a non-public address: {host}")
+
+
+class Job:
+    """A unit of work tracked by the job queue"""
+
+    def __init__(self, func, args, kwargs, callback_url=None, then=None):
+        self.id = uuid.uuid4().hex
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.callback_url = callback_url
+        # Follow-up step run off the worker with func's result; its return value is the job's result
+        self.then = then
+        self.status = "queued"  # queued | running | done | error
+        self.result = None
+        self.error = None
+        self.exception = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        # Profiler of the request that submitted the job, sampling the worker too
+        self.profiler = None
+        self._done = threading.Event()
+
+    def wait(self, timeout=None):
+        """Block until the job finishes; returns True if it finished"""
+        return self._done.wait(timeout)
+
+    def to_dict(self):
+        """Serialize the job for the polling API"""
+        data = {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.status == "done":
+            data["result"] = self.result
+        elif self.status == "error":
+            data["error"] = self.error
+        return data
+
+
+class JobQueue:
+    """Fixed-size worker pool fed by a bounded FIFO queue"""
+
+    def __init__(self, workers=TRANSCRIBE_WORKERS, max_queue=TRANSCRIBE_QUEUE_SIZE,
+                 result_ttl=JOB_RESULT_TTL):
+        self.workers = max(1, workers)
+        self.result_ttl = result_ttl
+        self._queue = queue.Queue(maxsize=max(1, max_queue))
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._callbacks = ThreadPoolExecutor(
+            max_workers=JOB_CALLBACK_WORKERS, thread_name_prefix="job-callback"
+        )
+        self._followups = ThreadPoolExecutor(
+            max_workers=JOB_FOLLOWUP_WORKERS, thread_name_prefix="job-followup"
+        )
+        self._threads = []
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._worker, name=f"job-worker-{i}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        logger.info(
+            f"Job queue started with {self.workers} workers, queue size {max_queue}"
+        )
+
+    def submit(self, func, *args, callback_url=None, then=None, **kwargs):
+        """
+        Queue a call to func(*args, **kwargs)
+
+        When then is given, then(result) runs after func on a separate
+        follow-up thread, so slow non-inference work (such as an LLM call)
+        never holds a transcription worker; the job finishes with its result.
+
+        Raises:
+            InvalidCallbackError: If callback_url is not allowed
+            QueueFullError: If the queue is at capacity
+
+        Returns:
+            Job: The queued job
+        """
+        if callback_url:
+            validate_callback_url(callback_url)
+        self._purge_expired()
+        job = Job(func, args, kwargs, callback_url=callback_url, then=then)
+        with self._lock:
+            self._jobs[job.id] = job
+        try:
+            self._enqueue(job)
+        except QueueFullError:
+            with self._lock:
+                self._jobs.pop(job.id, None)
+            raise
+        return job
+
+    def run(self, func, *args, **kwargs):
+        """
+        Queue a call and block until it finishes, re-raising any error
+
+        The job is not registered for polling, since nobody else knows its id.
+
+        Raises:
+            QueueFullError: If the queue is at capacity
+
+        Returns:
+            The return value of func
+        """
+        job = Job(func, args, kwargs)
+        self._enqueue(job)
+        job.wait()
+        if job.status == "error":
+            raise job.exception
+        return job.result
+
+    def _enqueue(self, job):
+        """Put a job on the queue, raising QueueFullError if it is at capacity"""
+        if profiling_service.PROFILING:
+            job.profiler = profiling_service.current_profiler()
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            raise QueueFullError("Transcription queue is full, try again later")
+
+    def get(self, job_id):
+        """Look up a job by id; returns None if unknown or expired"""
+        self._purge_expired()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self):
+        """Report queue depth and job counts by status"""
+        self._purge_expired()
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize(),
+            "capacity": self._queue.maxsize,
+            "jobs": counts,
+        }
+
+    def _worker(self):
+        """Worker loop: take jobs off the queue and run them"""
+        while True:
+            job = self._queue.get()
+            job.status = "running"
+            job.started_at = time.time()
+            if job.profiler is not None:
+                job.profiler.add_thread()
+            failed = False
+            try:
+                job.result = job.func(*job.args, **job.kwargs)
+            except Exception as e:
+                self._fail(job, e)
+                failed = True
+            finally:
+                if job.profiler is not None:
+                    job.profiler.remove_thread()
+                self._queue.task_done()
+
+            if not failed and job.then is not None:
+                self._followups.submit(self._run_followup, job)
+            else:
+                self._finish(job)
+
+    def _run_followup(self, job):
+        """Run a job's follow-up step with its result (on a follow-up thread)"""
+        try:
+            job.result = job.then(job.result)
+        except Exception as e:
+            self._fail(job, e)
+        self._finish(job)
+
+    def _fail(self, job, error):
+        """Record a job's exception"""
+        logger.error(f"Job {job.id} failed: {str(error)}")
+        job.exception = error
+        job.error = str(error)
+        job.status = "error"
+
+    def _finish(self, job):
+        """Mark a job finished, wake its waiters and queue its callback"""
+        if job.status != "error":
+            job.status = "done"
+        job.finished_at = time.time()
+        # Release the inputs (upload bytes, decoded audio) while the result is kept for polling
+        job.func = job.args = job.kwargs = job.then = None
+        job.profiler = None
+        job._done.set()
+        if job.callback_url:
+            self._callbacks.submit(self._send_callback, job)
+
+    def _send_callback(self, job):
+        """POST the finished job to its callback URL (on a callback thread)"""
+        try:
+            # Checked again at delivery in case the host now resolves elsewhere
+            validate_callback_url(job.callback_url)
+            request = urllib.request.Request(
+                job.callback_url,
+                data=json.dumps(job.to_dict()).encode("utf-8"),
+                headers={"Content-Type": "application/json"},
+                method="POST",
+            )
+            urllib.request.urlopen(request, timeout=JOB_CALLBACK_TIMEOUT).close()
+        except Exception as e:
+            logger.error(f"Error delivering callback for job {job.id}: {str(e)}")
+
+    def _purge_expired(self):
+        """Forget finished jobs older than the result TTL"""
+        cutoff = time.time() - self.result_ttl
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.finished_at is not None and job.finished_at < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+
+# Global job queue instance
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """Get or create the global job queue"""
+    global _job_queue
+    if _job_queue is None:
+        with _job_queue_lock:
+            if _job_queue is None:
+                _job_queue = JobQueue()
+    return _job_queue
+
+
+def _collect_metrics():
+    """Report queue depth and job counts on /api/metrics"""
+    if _job_queue is None:
+        return []
+    stats = _job_queue.stats()
+    queued = metrics_service.Gauge(
+        "caption_job_queue_depth",
+        "Transcription jobs waiting for a worker",
+    )
+    queued.set(stats["queued"])
+    workers = metrics_service.Gauge(
+        "caption_job_workers",
+        "Transcription worker threads",
+    )
+    workers.set(stats["workers"])
+    jobs = metrics_service.Gauge(
+        "caption_jobs",
+        "Tracked transcription jobs by status",
+        ["status"],
+    )
+    for status, count in stats["jobs"].items():
+        jobs.set(count, (status,))
+    return [queued, workers, jobs]
+
+
+metrics_service.register_collector(_collect_metrics)
@@ -0,0 +1,305 @@
+"""
+Metrics Service for Reuters Caption Generator
+In-process counters, gauges and histograms exposed in Prometheus text format
+"""
+
+import os
+import time
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(
+    level=getattr(logging, os.getenv("LOG_LEVEL", "INFO")),
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+# Collect metrics and serve /api/metrics
+METRICS = os.getenv("METRICS", "True").lower() == "true"
+
+# Histogram buckets (seconds) for pipeline stages and whole requests
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# Histogram buckets for the real-time factor (processing seconds per audio second)
+REALTIME_FACTOR_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 5)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    """Escape a label value for the Prometheus text format"""
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base class: a named metric family with fixed label names"""
+
+    type = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing total"""
+
+    type = "counter"
+
+    def inc(self, amount=1, labels=()):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+
+    type = "gauge"
+
+    def set(self, value, labels=()):
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, amount=1, labels=()):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, amount=1, labels=()):
+        self.inc(-amount, labels)
+
+
+class Histogram(_Metric):
+    """Distribution of observations in cumulative buckets"""
+
+    type = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DURATION_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, labels=()):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                # Per-bucket counts (last slot is +Inf), then sum
+                series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            items = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._values.items())
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+# Metric families
+STAGE_SECONDS = Histogram(
+    "caption_stage_duration_seconds",
+    "Time spent in each pipeline stage",
+    ["stage"],
+)
+REQUEST_SECONDS = Histogram(
+    "caption_http_request_duration_seconds",
+    "HTTP request latency by endpoint",
+    ["endpoint"],
+)
+REQUESTS = Counter(
+    "caption_http_requests_total",
+    "HTTP requests by endpoint and status code",
+    ["endpoint", "status"],
+)
+IN_FLIGHT = Gauge(
+    "caption_http_requests_in_flight",
+    "HTTP requests currently being handled",
+    ["endpoint"],
+)
+AUDIO_SECONDS = Counter(
+    "caption_audio_seconds_total",
+    "Seconds of audio processed, before (input) and after (speech) silence trimming",
+    ["kind"],
+)
+REALTIME_FACTOR = Histogram(
+    "caption_transcribe_realtime_factor",
+    "Whisper processing time divided by the duration of the audio it decoded",
+    ["model"],
+    buckets=REALTIME_FACTOR_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "caption_llm_tokens_total",
+    "LLM tokens by type (input, output, cache_read, cache_creation)",
+    ["type"],
+)
+ERRORS = Counter(
+    "caption_errors_total",
+    "Errors by pipeline stage and exception type",
+    ["stage", "type"],
+)
+
+_metrics = [
+    STAGE_SECONDS, REQUEST_SECONDS, REQUESTS, IN_FLIGHT,
+    AUDIO_SECONDS, REALTIME_FACTOR, LLM_TOKENS, ERRORS,
+]
+
+# Callables run at scrape time to report state owned by other modules
+_collectors = []
+
+
+def register_collector(collector):
+    """
+    Register a function run on every scrape
+
+    Use this for values that are cheap to read but expensive or awkward to
+    track on the hot path (model state, cache and queue sizes).
+
+    Args:
+        collector (callable): Returns a list of metric families (Counter,
+            Gauge or Histogram instances) freshly filled for this scrape
+    """
+    _collectors.append(collector)
+
+
+def observe_stage(stage, seconds):
+    """Record the duration of one pipeline stage"""
+    if METRICS:
+        STAGE_SECONDS.observe(seconds, (stage,))
+
+
+@contextmanager
+def timer(stage):
+    """Context manager timing a pipeline stage"""
+    if not METRICS:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, (stage,))
+
+
+def timed(stage):
+    """Decorator timing every call of a function as a pipeline stage"""
+    def decorator(func):
+        if not METRICS:
+            return func
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                STAGE_SECONDS.observe(time.perf_counter() - start, (stage,))
+        return wrapper
+    return decorator
+
+
+def record_transcription(model, audio_seconds, speech_seconds, transcribe_seconds):
+    """
+    Record audio processed by Whisper and the resulting real-time factor
+
+    Args:
+        model (str): "main" or "draft"
+        audio_seconds (float): Input audio duration before silence trimming
+        speech_seconds (float): Audio duration passed to the model
+        transcribe_seconds (float): Time the model took
+    """
+    if not METRICS:
+        return
+    AUDIO_SECONDS.inc(audio_seconds, ("input",))
+    AUDIO_SECONDS.inc(speech_seconds, ("speech",))
+    if speech_seconds > 0:
+        REALTIME_FACTOR.observe(transcribe_seconds / speech_seconds, (model,))
+
+
+def record_llm_usage(usage):
+    """Add a response's token usage (as returned by extract_usage) to the totals"""
+    if not METRICS:
+        return
+    LLM_TOKENS.inc(usage["input_tokens"], ("input",))
+    LLM_TOKENS.inc(usage["output_tokens"], ("output",))
+    LLM_TOKENS.inc(usage["cache_read_input_tokens"], ("cache_read",))
+    LLM_TOKENS.inc(usage["cache_creation_input_tokens"], ("cache_creation",))
+
+
+def record_error(stage, error):
+    """Count an exception raised in a pipeline stage"""
+    if METRICS:
+        ERRORS.inc(1, (stage, type(error).__name__))
+
+
+def request_started(endpoint):
+    """Mark an HTTP request as in flight; returns its start time"""
+    IN_FLIGHT.inc(1, (endpoint,))
+    return time.perf_counter()
+
+
+def request_finished(endpoint, status, started):
+    """Record an HTTP request's latency and status once it has completed"""
+    IN_FLIGHT.dec(1, (endpoint,))
+    REQUEST_SECONDS.observe(time.perf_counter() - started, (endpoint,))
+    REQUESTS.inc(1, (endpoint, str(status)))
+
+
+def render_metrics():
+    """
+    Render every metric in the Prometheus text exposition format
+
+    Returns:
+        str: Metrics text, ending with a newline
+    """
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for collector in _collectors:
+        try:
+            for metric in collector():
+                lines.extend(metric.render())
+        except Exception as e:
+            logger.error(f"Error collecting metrics: {str(e)}")
+    return "\n".join(lines) + "\n"
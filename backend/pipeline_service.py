@@ -0,0 +1,164 @@
+"""
+Pipeline Service for Reuters Caption Generator
+Runs transcription and caption generation as one server-side pipeline
+"""
+
+import os
+import re
+import time
+import logging
+from dotenv import load_dotenv
+
+import claude_service
+import job_service
+import whisper_service
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(
+    level=getattr(logging, os.getenv("LOG_LEVEL", "INFO")),
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+
+def generate_caption(transcription, use_cache=True):
+    """
+    Generate a caption on the async engine when enabled, else synchronously
+
+    Args:
+        transcription (str): Transcribed text from the audio
+        use_cache (bool): Set to False to bypass the caption cache
+
+    Returns:
+        dict: Caption sections as returned by claude_service
+    """
+    if claude_service.LLM_ASYNC:
+        # Run on the shared event loop instead of a blocking client call
+        return claude_service.run_coroutine(
+            claude_service.generate_caption_async(transcription, use_cache=use_cache)
+        )
+    return claude_service.generate_caption(transcription, use_cache=use_cache)
+
+
+def caption_from_audio(transcribe, use_cache=True):
+    """
+    Transcribe audio and caption the result in a single pipeline
+
+    The caption call starts as soon as the transcription is ready, and is
+    skipped entirely when no speech was detected.
+
+    Args:
+        transcribe (callable): Zero-argument callable returning a transcription
+            result dict (transcription, speech_detected, vad)
+        use_cache (bool): Set to False to bypass the caption cache
+
+    Returns:
+        dict: Transcription result and caption sections, plus per-stage timings
+    """
+    started = time.perf_counter()
+    result = transcribe()
+    transcribed = time.perf_counter()
+    timings = {"transcribe_seconds": round(transcribed - started, 3)}
+
+    if result.get("speech_detected", True):
+        caption = generate_caption(result["transcription"], use_cache=use_cache)
+    else:
+        caption = generate_caption("", use_cache=use_cache)
+    finished = time.perf_counter()
+
+    timings["caption_seconds"] = round(finished - transcribed, 3)
+    timings["total_seconds"] = round(finished - started, 3)
+    logger.info(f"Audio-to-caption pipeline finished: {timings}")
+    return dict(result, **caption, timings=timings)
+
+
+def _normalize_text(text):
+    """Normalize a transcript for change detection (case, spacing, punctuation)"""
+    return re.sub(r"[^\w\s]", "", re.sub(r"\s+", " ", text)).strip().lower()
+
+
+def _draft_pass(audio):
+    """
+    First pass of two-pass mode, run on the job queue: decode and transcribe
+    with the draft model
+
+    Returns:
+        tuple: (16 kHz mono float32 audio, draft transcription result)
+    """
+    if isinstance(audio, (bytes, bytearray)):
+        audio = whisper_service.decode_audio_bytes(audio)
+    return audio, whisper_service.transcribe_audio_with_details(audio, draft=True)
+
+
+def _upgrade_transcription(audio, draft_transcription):
+    """
+    Second pass of two-pass mode: re-transcribe with the main model
+
+    Returns:
+        dict: The full transcription result with a `changed` flag
+    """
+    result = whisper_service.transcribe_audio_with_details(audio)
+    changed = _normalize_text(result["transcription"]) != _normalize_text(draft_transcription)
+    return dict(result, changed=changed)
+
+
+def _caption_upgrade(result, use_cache):
+    """
+    Follow-up of the upgrade job, run off the transcription workers: regenerate
+    the caption when the upgraded text differs from the draft
+
+    Returns:
+        dict: The upgrade result, carrying the new caption if the text changed
+    """
+    if result["changed"] and result.get("speech_detected", True):
+        logger.info("Upgraded transcription differs from draft, regenerating caption")
+        result = dict(result, **generate_caption(result["transcription"], use_cache=use_cache))
+    return result
+
+
+def caption_from_audio_two_pass(audio, use_cache=True):
+    """
+    Draft-then-upgrade pipeline
+
+    The draft model's transcription and caption are returned right away;
+    decoding and the draft pass run on the job queue like every other
+    transcription. The main model then re-transcribes on the job queue; poll
+    the returned upgrade_job_id (GET /api/jobs/<id>) for the upgraded text,
+    which only carries a new caption if the text actually changed. That
+    caption is generated in the job's follow-up step, not on a worker.
+
+    Args:
+        audio (np.ndarray or bytes): 16 kHz mono float32 audio, or encoded audio bytes
+        use_cache (bool): Set to False to bypass the caption cache
+
+    Raises:
+        job_service.QueueFullError: If the job queue has no room for the draft pass
+
+    Returns:
+        dict: Draft transcription and caption, timings and upgrade_job_id
+            (None if the queue was full or there was no speech)
+    """
+    job_queue = job_service.get_job_queue()
+    decoded = {}
+
+    def transcribe_draft():
+        decoded["audio"], result = job_queue.run(_draft_pass, audio)
+        return result
+
+    result = caption_from_audio(transcribe_draft, use_cache=use_cache)
+
+    upgrade_job_id = None
+    if result.get("speech_detected", True):
+        try:
+            job = job_queue.submit(
+                _upgrade_transcription, decoded["audio"], result["transcription"],
+                then=lambda upgrade: _caption_upgrade(upgrade, use_cache),
+            )
+            upgrade_job_id = job.id
+        except job_service.QueueFullError:
+            logger.warning("Job queue full, returning draft without an upgrade pass")
+
+    return dict(result, draft=True, upgrade_job_id=upgrade_job_id)
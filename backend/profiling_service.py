@@ -0,0 +1,175 @@
+"""
+Profiling Service for Reuters Caption Generator
+Opt-in sampling profiler for single requests, saved as flamegraph-ready stacks
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import logging
+import threading
+from collections import Counter
+from pathlib import Path
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(
+    level=getattr(logging, os.getenv("LOG_LEVEL", "INFO")),
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+# Allow requests to ask for a profile (X-Profile: 1 header or ?profile=1)
+PROFILING = os.getenv("PROFILING", "False").lower() == "true"
+
+# Where profiles are written, and the interval between stack samples
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "profiles"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", 5))
+
+# Profile ids are generated here; anything else is rejected when reading back
+PROFILE_ID_PATTERN = re.compile(r"^[0-9]{8}-[0-9]{6}-[0-9a-f]{8}$")
+
+# Profiler attached to the current thread's request, if any
+_local = threading.local()
+
+
+class SamplingProfiler:
+    """
+    Samples the Python stacks of a set of threads at a fixed interval
+
+    The request thread is watched from start(); other threads doing work on
+    the request's behalf (job queue workers) join with add_thread(). Stacks
+    are counted in collapsed form, one "frame;frame;frame count" line per
+    distinct stack, which flamegraph.pl, inferno and speedscope read directly.
+    """
+
+    def __init__(self, interval_ms=PROFILE_INTERVAL_MS, label=""):
+        self.id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.interval = max(interval_ms, 0.5) / 1000
+        self.label = label
+        self.samples = Counter()
+        self.started_at = None
+        self.duration = None
+        self._threads = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = None
+
+    def add_thread(self, ident=None, name=None):
+        """Start sampling a thread (the calling thread by default)"""
+        ident = ident or threading.get_ident()
+        with self._lock:
+            self._threads[ident] = name or threading.current_thread().name
+
+    def remove_thread(self, ident=None):
+        """Stop sampling a thread"""
+        with self._lock:
+            self._threads.pop(ident or threading.get_ident(), None)
+
+    def start(self):
+        """Attach to the calling thread and begin sampling"""
+        self.started_at = time.perf_counter()
+        self.add_thread()
+        _local.profiler = self
+        self._sampler = threading.Thread(target=self._run, name=f"profiler-{self.id}", daemon=True)
+        self._sampler.start()
+
+    def stop(self):
+        """Stop sampling and detach from the calling thread"""
+        _local.profiler = None
+        self._stop.set()
+        self._sampler.join()
+        self.duration = time.perf_counter() - self.started_at
+
+    def _run(self):
+        """Sampler loop: record the stack of every watched thread"""
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                threads = list(self._threads.items())
+            for ident, name in threads:
+                frame = frames.get(ident)
+                if frame is None or ident == own:
+                    continue
+                self.samples[_collapse(frame, name)] += 1
+
+    def save(self, directory=PROFILE_DIR):
+        """
+        Write the collapsed stacks and a metadata file
+
+        Args:
+            directory (Path): Profile directory
+
+        Returns:
+            Path: The .folded file
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        folded = directory / f"{self.id}.folded"
+        folded.write_text("".join(f"{stack} {count}\n" for stack, count in self.samples.most_common()))
+        (directory / f"{self.id}.json").write_text(json.dumps({
+            "id": self.id,
+            "label": self.label,
+            "created_at": time.time(),
+            "duration_seconds": round(self.duration or 0, 4),
+            "interval_ms": self.interval * 1000,
+            "samples": sum(self.samples.values()),
+        }, indent=2))
+        logger.info(f"Saved profile {self.id} ({sum(self.samples.values())} samples) to {folded}")
+        return folded
+
+
+def _collapse(frame, thread_name):
+    """Render a stack as root-first "thread;func (file:line);..." for collapsed output"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    names.append(thread_name)
+    return ";".join(reversed(names))
+
+
+def current_profiler():
+    """The profiler attached to the calling thread's request, or None"""
+    return getattr(_local, "profiler", None)
+
+
+def profile_requested(headers, args):
+    """
+    Check whether a request asked to be profiled
+
+    Args:
+        headers: Request headers
+        args: Query string arguments
+
+    Returns:
+        bool: True if profiling is enabled and the request opted in
+    """
+    if not PROFILING:
+        return False
+    flag = headers.get("X-Profile") or args.get("profile") or ""
+    return flag.lower() in ("1", "true", "yes")
+
+
+def get_profile_path(profile_id):
+    """
+    Locate a saved profile
+
+    Args:
+        profile_id (str): Id returned in the X-Profile-Id header
+
+    Returns:
+        Path: The .folded file, or None if the id is invalid or unknown
+    """
+    if not PROFILE_ID_PATTERN.match(profile_id):
+        return None
+    path = PROFILE_DIR / f"{profile_id}.folded"
+    return path if path.exists() else None
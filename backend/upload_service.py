@@ -0,0 +1,445 @@
+"""
+Upload Service for Reuters Caption Generator
+Chunked, resumable audio uploads written straight to disk
+"""
+
+import os
+import time
+import uuid
+import logging
+import threading
+from pathlib import Path
+import numpy as np
+import soundfile as sf
+from dotenv import load_dotenv
+import whisper_service
+import job_service
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(
+    level=getattr(logging, os.getenv("LOG_LEVEL", "INFO")),
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+# Where in-progress uploads are assembled
+UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", "uploads/chunked"))
+
+# Default chunk size, and the largest a client may choose (one request body)
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 4 * 1024 * 1024))
+UPLOAD_MAX_CHUNK_SIZE = 16 * 1024 * 1024
+
+# Largest accepted upload, and how long an idle upload can wait to be resumed (seconds)
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", 1024 * 1024 * 1024))
+UPLOAD_TTL = int(os.getenv("UPLOAD_TTL", 3600))
+
+# Chunk bodies are copied to disk in blocks of this size
+WRITE_BLOCK_SIZE = 64 * 1024
+
+# Early transcription: how far back from the end of a window to look for a quiet cut
+EARLY_SEARCH_SECONDS = 5
+
+
+class UploadNotFoundError(Exception):
+    """Raised when an upload does not exist or has expired"""
+
+
+class UploadError(Exception):
+    """Raised when a chunk or finalize request cannot be accepted"""
+
+
+class ChunkTooLargeError(UploadError):
+    """Raised when a chunk body is larger than the upload's chunk size"""
+
+
+class IncompleteUploadError(UploadError):
+    """Raised when finalizing an upload with chunks still missing"""
+
+    def __init__(self, message, missing):
+        super().__init__(message)
+        self.missing = missing
+
+
+class _PrefixFile:
+    """
+    Read-only view of a file that ends after `limit` bytes
+
+    Lets libsndfile decode the chunks that have arrived in order without
+    seeing the gaps left for chunks that are still in flight.
+    """
+
+    def __init__(self, path, limit):
+        self._file = open(path, "rb")
+        self._limit = limit
+
+    def read(self, size=-1):
+        remaining = max(0, self._limit - self._file.tell())
+        return self._file.read(remaining if size < 0 else min(size, remaining))
+
+    def seek(self, offset, whence=0):
+        if whence == 2:
+            offset, whence = self._limit + offset, 0
+        return self._file.seek(offset, whence)
+
+    def tell(self):
+        return self._file.tell()
+
+    def close(self):
+        self._file.close()
+
+
+class EarlyTranscription:
+    """
+    Transcribes an upload while its later chunks are still arriving
+
+    Each call to advance() decodes the frames that have arrived since the
+    last call, cuts windows of about window_seconds at quiet points and
+    queues them on the transcription job queue. finish() queues the rest
+    and joins the texts in order. Only formats libsndfile can read from a
+    truncated file (WAV, OGG) qualify; for anything else, or when the job
+    queue is full, failed is set and the upload is transcribed whole.
+    """
+
+    def __init__(self, path, window_seconds=whisper_service.WHISPER_STREAM_WINDOW_SECONDS):
+        self.path = path
+        self.window = int(window_seconds * whisper_service.SAMPLE_RATE)
+        self.search = int(EARLY_SEARCH_SECONDS * whisper_service.SAMPLE_RATE)
+        self.failed = False
+        self._available = 0
+        self._frames_read = 0
+        self._pending = np.empty(0, dtype=np.float32)
+        self._jobs = []
+        self._lock = threading.Lock()
+
+    def advance(self, available_bytes, block=False):
+        """
+        Decode newly arrived audio and queue finished windows
+
+        Args:
+            available_bytes (int): Length of the contiguous prefix on disk
+            block (bool): Wait for a concurrent advance() instead of skipping;
+                a skipped call's data is picked up by the next one
+        """
+        if not self._lock.acquire(blocking=block):
+            return
+        try:
+            # Nothing new has arrived in order since the last call
+            if self.failed or available_bytes <= self._available:
+                return
+            self._available = available_bytes
+            try:
+                source = _PrefixFile(self.path, available_bytes)
+                try:
+                    with sf.SoundFile(source) as f:
+                        sample_rate = f.samplerate
+                        f.seek(min(self._frames_read, f.frames))
+                        data = f.read(dtype="float32", always_2d=True)
+                finally:
+                    source.close()
+            except Exception as e:
+                logger.info(f"Upload cannot be decoded incrementally, transcribing at finalize: {str(e)}")
+                self.failed = True
+                return
+
+            if not len(data):
+                return
+            self._frames_read += len(data)
+            audio = whisper_service.resample_audio(data.mean(axis=1), sample_rate)
+            self._pending = np.concatenate([self._pending, audio])
+            while len(self._pending) >= self.window and not self.failed:
+                cut = whisper_service.find_quiet_point(self._pending, self.window - self.search, self.window)
+                self._submit(self._pending[:cut])
+                self._pending = self._pending[cut:]
+        finally:
+            self._lock.release()
+
+    def _submit(self, audio):
+        try:
+            self._jobs.append(
+                job_service.get_job_queue().submit(whisper_service.transcribe_audio_with_details, audio)
+            )
+        except job_service.QueueFullError:
+            logger.info("Job queue full, upload will be transcribed at finalize")
+            self.failed = True
+
+    def finish(self, total_bytes):
+        """
+        Transcribe the remaining audio and combine the windows
+
+        Args:
+            total_bytes (int): Size of the complete upload
+
+        Returns:
+            dict: transcription text, speech_detected flag and number of
+                windows, or None if the upload must be transcribed whole
+        """
+        self.advance(total_bytes, block=True)
+        if not self.failed and len(self._pending):
+            self._submit(self._pending)
+            self._pending = self._pending[:0]
+        if self.failed:
+            return None
+
+        results = []
+        for job in self._jobs:
+            job.wait()
+            if job.status == "error":
+                # A retried finalize transcribes the whole file instead
+                self.failed = True
+                raise job.exception
+            results.append(job.result)
+        return {
+            "transcription": " ".join(r["transcription"] for r in results if r["transcription"]),
+            "speech_detected": any(r["speech_detected"] for r in results),
+            "vad": None,
+            "windows": len(results),
+        }
+
+
+class ChunkedUpload:
+    """
+    An upload assembled from numbered chunks
+
+    Chunk i is written at byte offset i * chunk_size of a single file, so
+    chunks may arrive in any order and be retried. Every chunk except the
+    last must be exactly chunk_size bytes.
+    """
+
+    def __init__(self, filename, chunk_size=UPLOAD_CHUNK_SIZE, total_size=None, transcribe_early=False):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.chunk_size = chunk_size
+        self.total_size = total_size
+        self.received = {}  # chunk index -> bytes written
+        self.finalizing = False
+        self.last_used = time.time()
+        self.lock = threading.Lock()
+
+        extension = Path(filename).suffix.lower() or ".wav"
+        UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+        self.path = UPLOAD_DIR / f"{self.id}{extension}"
+        self.path.touch()
+        self.early = EarlyTranscription(self.path) if transcribe_early else None
+
+    def contiguous_chunks(self):
+        """Number of chunks received without a gap from chunk 0"""
+        count = 0
+        while count in self.received:
+            count += 1
+        return count
+
+    def write_chunk(self, index, stream):
+        """
+        Copy one chunk from a request body straight to its place on disk
+
+        Args:
+            index (int): Chunk number, starting at 0
+            stream: Readable request body
+
+        Raises:
+            UploadError: If the index is out of range or the upload is finalizing
+            ChunkTooLargeError: If the body is larger than chunk_size
+
+        Returns:
+            int: Bytes written
+        """
+        with self.lock:
+            if self.finalizing:
+                raise UploadError("Upload is already being finalized")
+            if index < 0 or index * self.chunk_size >= UPLOAD_MAX_BYTES:
+                raise UploadError(f"Chunk index {index} is out of range")
+            if self.total_size is not None and index * self.chunk_size >= self.total_size:
+                raise UploadError(f"Chunk index {index} is beyond the declared total size")
+            # A retried chunk is not acknowledged again until it is fully written
+            self.received.pop(index, None)
+            self.last_used = time.time()
+
+        written = 0
+        with open(self.path, "r+b") as f:
+            f.seek(index * self.chunk_size)
+            while True:
+                block = stream.read(min(WRITE_BLOCK_SIZE, self.chunk_size + 1 - written))
+                if not block:
+                    break
+                written += len(block)
+                if written > self.chunk_size:
+                    raise ChunkTooLargeError(f"Chunk is larger than the chunk size of {self.chunk_size} bytes")
+                f.write(block)
+
+        with self.lock:
+            self.received[index] = written
+            self.last_used = time.time()
+            contiguous = self.contiguous_chunks()
+            available = sum(self.received[i] for i in range(contiguous))
+
+        if self.early is not None:
+            self.early.advance(available)
+        return written
+
+    def missing_chunks(self):
+        """Chunks that must still arrive before the upload can be finalized"""
+        with self.lock:
+            if self.total_size is not None:
+                expected = max(1, -(-self.total_size // self.chunk_size))
+            else:
+                expected = max(self.received, default=-1) + 1
+            return [i for i in range(expected) if i not in self.received]
+
+    def to_dict(self):
+        """Serialize the upload's progress for the status API"""
+        with self.lock:
+            return {
+                "upload_id": self.id,
+                "filename": self.filename,
+                "chunk_size": self.chunk_size,
+                "total_size": self.total_size,
+                "received_chunks": sorted(self.received),
+                "received_bytes": sum(self.received.values()),
+                "next_chunk": self.contiguous_chunks(),
+                "transcribe_early": self.early is not None,
+            }
+
+
+# Live uploads by id
+_uploads = {}
+_uploads_lock = threading.Lock()
+
+
+def _purge_uploads():
+    """Drop uploads idle for longer than UPLOAD_TTL and delete their files"""
+    cutoff = time.time() - UPLOAD_TTL
+    with _uploads_lock:
+        expired = [upload for upload in _uploads.values() if upload.last_used < cutoff and not upload.finalizing]
+        for upload in expired:
+            del _uploads[upload.id]
+    for upload in expired:
+        logger.info(f"Upload {upload.id} expired")
+        whisper_service.cleanup_audio_file(upload.path)
+
+
+def create_upload(filename, chunk_size=None, total_size=None, transcribe_early=False):
+    """
+    Start a chunked upload
+
+    Args:
+        filename (str): Original file name (its extension picks the decoder)
+        chunk_size (int): Bytes per chunk (default UPLOAD_CHUNK_SIZE)
+        total_size (int): Expected size in bytes, if known
+        transcribe_early (bool): Start transcribing chunks as they arrive
+
+    Raises:
+        UploadError: If the chunk size or total size is not acceptable
+
+    Returns:
+        dict: Upload status, including upload_id and chunk_size
+    """
+    try:
+        chunk_size = int(chunk_size or UPLOAD_CHUNK_SIZE)
+        total_size = int(total_size) if total_size is not None else None
+    except (TypeError, ValueError):
+        raise UploadError("chunk_size and total_size must be integers")
+    if not 0 < chunk_size <= UPLOAD_MAX_CHUNK_SIZE:
+        raise UploadError(f"chunk_size must be between 1 and {UPLOAD_MAX_CHUNK_SIZE} bytes")
+    if total_size is not None and not 0 < total_size <= UPLOAD_MAX_BYTES:
+        raise UploadError(f"total_size must be between 1 and {UPLOAD_MAX_BYTES} bytes")
+
+    _purge_uploads()
+    upload = ChunkedUpload(filename, chunk_size, total_size, transcribe_early)
+    with _uploads_lock:
+        _uploads[upload.id] = upload
+    logger.info(f"Created chunked upload {upload.id} ({filename}, {chunk_size} byte chunks)")
+    return upload.to_dict()
+
+
+def get_upload(upload_id):
+    """
+    Look up a live upload
+
+    Raises:
+        UploadNotFoundError: If the upload does not exist or has expired
+    """
+    _purge_uploads()
+    with _uploads_lock:
+        upload = _uploads.get(upload_id)
+    if upload is None:
+        raise UploadNotFoundError(f"Upload {upload_id} not found or expired")
+    return upload
+
+
+def write_chunk(upload_id, index, stream):
+    """
+    Store one chunk of an upload
+
+    Returns:
+        dict: Upload status after the chunk, with next_chunk to resume from
+    """
+    upload = get_upload(upload_id)
+    written = upload.write_chunk(index, stream)
+    logger.info(f"Upload {upload_id}: chunk {index} received ({written} bytes)")
+    return dict(upload.to_dict(), chunk=index, chunk_bytes=written)
+
+
+def finalize_upload(upload_id):
+    """
+    Finish an upload and transcribe it
+
+    With early transcription, windows already decoded while the upload was
+    in progress are reused and only the tail is left to transcribe.
+    Otherwise the assembled file is decoded from disk on the job queue.
+
+    Raises:
+        UploadNotFoundError: If the upload does not exist or has expired
+        IncompleteUploadError: If chunks are missing or the wrong size
+
+    Returns:
+        dict: transcription text, speech_detected flag and VAD stats
+    """
+    upload = get_upload(upload_id)
+    missing = upload.missing_chunks()
+    if missing:
+        raise IncompleteUploadError(f"Upload {upload_id} is missing {len(missing)} chunks", missing)
+
+    with upload.lock:
+        if upload.finalizing:
+            raise UploadError("Upload is already being finalized")
+        last = max(upload.received)
+        short = [i for i in range(last) if upload.received[i] != upload.chunk_size]
+        total = sum(upload.received.values())
+        if short:
+            raise IncompleteUploadError(f"Chunks {short} are shorter than the chunk size", short)
+        if upload.total_size is not None and total != upload.total_size:
+            raise UploadError(f"Received {total} bytes, expected {upload.total_size}")
+        upload.finalizing = True
+
+    try:
+        # Chunks written past the end of a retried last chunk are cut off
+        os.truncate(upload.path, total)
+        logger.info(f"Finalizing upload {upload_id} ({total} bytes)")
+
+        result = upload.early.finish(total) if upload.early is not None else None
+        if result is None:
+            with open(upload.path, "rb") as f:
+                result = job_service.get_job_queue().run(whisper_service.transcribe_audio_bytes, f)
+    except Exception:
+        # Leave the upload in place so finalize can be retried
+        with upload.lock:
+            upload.finalizing = False
+            upload.last_used = time.time()
+        raise
+
+    with _uploads_lock:
+        _uploads.pop(upload_id, None)
+    whisper_service.cleanup_audio_file(upload.path)
+    return result
+
+
+def abort_upload(upload_id):
+    """Cancel an upload and delete its data"""
+    upload = get_upload(upload_id)
+    with _uploads_lock:
+        _uploads.pop(upload_id, None)
+    whisper_service.cleanup_audio_file(upload.path)
+    logger.info(f"Aborted upload {upload_id}")
@@ -3,12 +3,27 @@ Whisper Service for Reuters Caption Generator
 Handles audio transcription using OpenAI's Whisper model
 """
 
+import io
 import os
+import hashlib
+import time
+import shutil
+import subprocess
 import tempfile
 import logging
+import threading
+import queue
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
+import numpy as np
+import soundfile as sf
+import torch
 import whisper
 from dotenv import load_dotenv
+from cache_service import ResultCache
+import metrics_service
 
 # Load environment variables
 load_dotenv()
@@ -23,52 +38,1078 @@ logger = logging.getLogger(__name__)
 # Get Whisper model size from environment variables
 WHISPER_MODEL = os.getenv("WHISPER_MODEL", "large")
 
-# Initialize Whisper model (lazy loading - will only load when first used)
+# Transcription backend: "openai-whisper" (PyTorch reference implementation)
+# or "ctranslate2" (faster-whisper, quantized CPU inference)
+WHISPER_ENGINE = os.getenv("WHISPER_ENGINE", "openai-whisper").lower()
+# CTranslate2 only: weight quantization ("int8", "int8_float32", "float32", ...)
+WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "int8")
+# CTranslate2 only: inference threads per model (0 = library default)
+WHISPER_CPU_THREADS = int(os.getenv("WHISPER_CPU_THREADS", 0))
+
+# Two-pass mode: a small model ("tiny" or "base") returns a draft right away while
+# WHISPER_MODEL re-transcribes in the background (empty = disabled)
+WHISPER_DRAFT_MODEL = os.getenv("WHISPER_DRAFT_MODEL", "")
+
+# Load the model in a background thread as soon as the app starts
+WHISPER_PRELOAD = os.getenv("WHISPER_PRELOAD", "False").lower() == "true"
+
+# Whisper models expect 16 kHz mono audio
+SAMPLE_RATE = whisper.audio.SAMPLE_RATE
+
+# Micro-batching of concurrent short clips into one padded mel batch
+WHISPER_BATCHING = os.getenv("WHISPER_BATCHING", "False").lower() == "true"
+WHISPER_BATCH_SIZE = int(os.getenv("WHISPER_BATCH_SIZE", 8))
+WHISPER_BATCH_WAIT_MS = int(os.getenv("WHISPER_BATCH_WAIT_MS", 20))
+
+# Voice activity trimming before inference
+WHISPER_VAD = os.getenv("WHISPER_VAD", "False").lower() == "true"
+WHISPER_VAD_MIN_DB = float(os.getenv("WHISPER_VAD_MIN_DB", -50))
+WHISPER_VAD_MARGIN_DB = float(os.getenv("WHISPER_VAD_MARGIN_DB", 10))
+WHISPER_VAD_MAX_GAP_SECONDS = float(os.getenv("WHISPER_VAD_MAX_GAP_SECONDS", 1.0))
+VAD_FRAME_SECONDS = 0.03
+VAD_PAD_SECONDS = 0.2
+VAD_MIN_SPEECH_SECONDS = 0.25
+
+# Transcription cache keyed by a hash of the decoded audio and decode options
+WHISPER_CACHE = os.getenv("WHISPER_CACHE", "True").lower() == "true"
+WHISPER_CACHE_SIZE = int(os.getenv("WHISPER_CACHE_SIZE", 128))
+# Optional SQLite file for a cache tier that survives restarts (empty = memory only)
+WHISPER_CACHE_DB = os.getenv("WHISPER_CACHE_DB", "")
+
+_transcription_cache = ResultCache(
+    "transcription", max_entries=WHISPER_CACHE_SIZE, db_path=WHISPER_CACHE_DB or None
+)
+
+# Streaming mode: transcribe finished windows while the microphone is still recording
+WHISPER_STREAMING = os.getenv("WHISPER_STREAMING", "False").lower() == "true"
+WHISPER_STREAM_WINDOW_SECONDS = int(os.getenv("WHISPER_STREAM_WINDOW_SECONDS", 30))
+
+# Long-audio mode: recordings longer than WHISPER_LONG_AUDIO_SECONDS are cut at quiet
+# points into segments of about WHISPER_SEGMENT_SECONDS and transcribed in parallel by
+# WHISPER_POOL_WORKERS processes, each holding its own copy of the model (0 disables)
+WHISPER_POOL_WORKERS = int(os.getenv("WHISPER_POOL_WORKERS", 0))
+WHISPER_LONG_AUDIO_SECONDS = float(os.getenv("WHISPER_LONG_AUDIO_SECONDS", 180))
+WHISPER_SEGMENT_SECONDS = float(os.getenv("WHISPER_SEGMENT_SECONDS", 60))
+# Audio repeated at the start of each segment so words on a cut are not lost
+WHISPER_SEGMENT_OVERLAP_SECONDS = float(os.getenv("WHISPER_SEGMENT_OVERLAP_SECONDS", 1.0))
+SEGMENT_SEARCH_SECONDS = 10
+OVERLAP_MAX_WORDS = 8
+OVERLAP_MIN_WORDS = 2
+
+
+class WhisperEngine:
+    """Transcription engine backed by openai-whisper (PyTorch)"""
+
+    name = "openai-whisper"
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+        self.model = None
+
+    def load(self):
+        """Load the model weights"""
+        self.model = whisper.load_model(self.model_name)
+
+    def info(self):
+        """Describe the engine, model and compute type in use"""
+        device = self.model.device.type if self.model is not None else None
+        return {
+            "engine": self.name,
+            "model": self.model_name,
+            "device": device,
+            "compute_type": "float16" if device == "cuda" else "float32",
+        }
+
+    def transcribe(self, audio):
+        """
+        Transcribe a clip of any length
+
+        Args:
+            audio (str or np.ndarray): Path, or 16 kHz mono float32 audio
+
+        Returns:
+            str: Transcribed text
+        """
+        return self.model.transcribe(audio)["text"].strip()
+
+    def decode_batch(self, audios):
+        """
+        Decode several clips of at most 30 seconds as one padded mel batch
+
+        Returns:
+            list: Transcribed text for each clip, in input order
+        """
+        mel = torch.stack([
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), n_mels=self.model.dims.n_mels)
+            for audio in audios
+        ]).to(self.model.device)
+        options = whisper.DecodingOptions(fp16=self.model.device.type == "cuda")
+        results = whisper.decode(self.model, mel, options)
+        return [result.text.strip() for result in results]
+
+
+class CTranslate2Engine:
+    """Transcription engine backed by faster-whisper (CTranslate2, quantized CPU)"""
+
+    name = "ctranslate2"
+
+    def __init__(self, model_name, compute_type=WHISPER_COMPUTE_TYPE, cpu_threads=WHISPER_CPU_THREADS):
+        self.model_name = model_name
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+        self.model = None
+
+    def load(self):
+        """Load (and on first use download) the converted model"""
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as e:
+            raise ImportError(
+                "WHISPER_ENGINE=ctranslate2 requires the faster-whisper package"
+            ) from e
+        self.model = WhisperModel(
+            self.model_name,
+            device="cpu",
+            compute_type=self.compute_type,
+            cpu_threads=self.cpu_threads,
+        )
+
+    def info(self):
+        """Describe the engine, model and compute type in use"""
+        return {
+            "engine": self.name,
+            "model": self.model_name,
+            "device": "cpu",
+            "compute_type": self.compute_type,
+        }
+
+    def transcribe(self, audio):
+        """
+        Transcribe a clip of any length
+
+        Args:
+            audio (str or np.ndarray): Path, or 16 kHz mono float32 audio
+
+        Returns:
+            str: Transcribed text
+        """
+        segments, _ = self.model.transcribe(audio)
+        return "".join(segment.text for segment in segments).strip()
+
+    def decode_batch(self, audios):
+        """CTranslate2 has no padded-batch entry point here; decode clips in turn"""
+        return [self.transcribe(audio) for audio in audios]
+
+
+# Engine classes selectable with WHISPER_ENGINE
+ENGINES = {
+    "openai-whisper": WhisperEngine,
+    "whisper": WhisperEngine,
+    "ctranslate2": CTranslate2Engine,
+    "faster-whisper": CTranslate2Engine,
+}
+
+
+def create_engine(model_name, engine_name=WHISPER_ENGINE):
+    """
+    Build an (unloaded) transcription engine
+
+    Raises:
+        ValueError: If engine_name is not a known engine
+    """
+    if engine_name not in ENGINES:
+        raise ValueError(
+            f"Unknown WHISPER_ENGINE '{engine_name}'. Options: {', '.join(sorted(ENGINES))}"
+        )
+    return ENGINES[engine_name](model_name)
+
+
+# Initialize transcription engine (lazy loading - will only load when first used)
 _model = None
 
+# Guards model loading so concurrent requests never load the model twice
+_model_lock = threading.Lock()
+
+# Small draft model for two-pass transcription (lazy loading)
+_draft_model = None
+_draft_model_lock = threading.Lock()
+
+# Draft model load progress, reported by /api/ready when WHISPER_DRAFT_MODEL is set
+_draft_model_status = {
+    "state": "not_loaded",  # not_loaded | loading | ready | error
+    "model": WHISPER_DRAFT_MODEL,
+    "error": None,
+    "load_started_at": None,
+    "load_seconds": None,
+}
+
+# Load progress reported by /api/ready
+_model_status = {
+    "state": "not_loaded",  # not_loaded | loading | ready | error
+    "model": WHISPER_MODEL,
+    "engine": WHISPER_ENGINE,
+    "compute_type": WHISPER_COMPUTE_TYPE if ENGINES.get(WHISPER_ENGINE) is CTranslate2Engine else None,
+    "error": None,
+    "load_started_at": None,
+    "load_seconds": None,
+}
+
 
 def get_model():
     """
-    Lazy-load the Whisper model to avoid loading it on startup
+    Lazy-load the transcription engine to avoid loading it on startup
+
+    Thread-safe: if another thread is already loading the model, this call
+    blocks until that load finishes instead of starting a second one.
     """
     global _model
-    if _model is None:
-        logger.info(f"Loading Whisper model: {WHISPER_MODEL}")
-        _model = whisper.load_model(WHISPER_MODEL)
-        logger.info("Whisper model loaded successfully")
+    if _model is not None:
+        return _model
+
+    with _model_lock:
+        if _model is None:
+            _model_status.update(
+                state="loading", error=None, load_started_at=time.time()
+            )
+            logger.info(f"Loading Whisper model: {WHISPER_MODEL} ({WHISPER_ENGINE})")
+            try:
+                engine = create_engine(WHISPER_MODEL)
+                engine.load()
+                _model = engine
+            except Exception as e:
+                _model_status.update(state="error", error=str(e))
+                metrics_service.record_error("model_load", e)
+                logger.error(f"Error loading Whisper model: {str(e)}")
+                raise
+            _model_status.update(
+                state="ready",
+                load_seconds=round(time.time() - _model_status["load_started_at"], 2),
+                **_model.info(),
+            )
+            logger.info(f"Whisper model loaded successfully: {_model.info()}")
     return _model
 
 
-def transcribe_audio(audio_file_path):
+def get_draft_model():
+    """
+    Lazy-load the draft model used for the first pass of two-pass mode
+
+    Returns:
+        The draft engine, or the main engine if no draft model is configured
+    """
+    global _draft_model
+    if not WHISPER_DRAFT_MODEL:
+        return get_model()
+    if _draft_model is None:
+        with _draft_model_lock:
+            if _draft_model is None:
+                _draft_model_status.update(
+                    state="loading", error=None, load_started_at=time.time()
+                )
+                logger.info(f"Loading Whisper draft model: {WHISPER_DRAFT_MODEL} ({WHISPER_ENGINE})")
+                try:
+                    engine = create_engine(WHISPER_DRAFT_MODEL)
+                    engine.load()
+                    _draft_model = engine
+                except Exception as e:
+                    _draft_model_status.update(state="error", error=str(e))
+                    metrics_service.record_error("model_load", e)
+                    logger.error(f"Error loading Whisper draft model: {str(e)}")
+                    raise
+                _draft_model_status.update(
+                    state="ready",
+                    load_seconds=round(time.time() - _draft_model_status["load_started_at"], 2),
+                )
+                logger.info("Whisper draft model loaded successfully")
+    return _draft_model
+
+
+def preload_model_async():
+    """
+    Start loading the Whisper model (and draft model, if set) in a background thread
+
+    Returns:
+        threading.Thread: The loader thread, or None if the models are already loaded
+    """
+    if _model is not None and (not WHISPER_DRAFT_MODEL or _draft_model is not None):
+        return None
+
+    def _load():
+        try:
+            # The draft model serves the first pass of two-pass requests, so load it first
+            if WHISPER_DRAFT_MODEL:
+                get_draft_model()
+            get_model()
+        except Exception:
+            # Already logged and recorded in the model status
+            pass
+
+    thread = threading.Thread(target=_load, name="whisper-preload", daemon=True)
+    thread.start()
+    logger.info("Started background Whisper model preload")
+    return thread
+
+
+def get_model_status():
+    """
+    Report the Whisper model load state
+
+    Returns:
+        dict: Load state, model name, error (if any) and timing information;
+            with WHISPER_DRAFT_MODEL set, the draft model's load under "draft"
+            and ready only once both models are loaded
+    """
+    status = _with_elapsed(_model_status)
+    status["ready"] = status["state"] == "ready"
+    if WHISPER_DRAFT_MODEL:
+        status["draft"] = _with_elapsed(_draft_model_status)
+        status["ready"] = status["ready"] and status["draft"]["state"] == "ready"
+    return status
+
+
+def _with_elapsed(model_status):
+    """Copy a load status, adding elapsed_seconds while the model is loading"""
+    status = dict(model_status)
+    if status["state"] == "loading" and status["load_started_at"]:
+        status["elapsed_seconds"] = round(time.time() - status["load_started_at"], 2)
+    return status
+
+
+def _collect_metrics():
+    """Report the Whisper model (and draft model) load state on /api/metrics"""
+    status = get_model_status()
+    models = [status] + ([status["draft"]] if "draft" in status else [])
+    state = metrics_service.Gauge(
+        "caption_model_state",
+        "Whisper model load state (1 for the current state)",
+        ["model", "engine", "state"],
+    )
+    load_seconds = metrics_service.Gauge(
+        "caption_model_load_seconds",
+        "Time the Whisper model took to load",
+        ["model"],
+    )
+    for model in models:
+        for name in ("not_loaded", "loading", "ready", "error"):
+            state.set(int(model["state"] == name), (model["model"], status["engine"], name))
+        if model["load_seconds"] is not None:
+            load_seconds.set(model["load_seconds"], (model["model"],))
+    return [state, load_seconds]
+
+
+metrics_service.register_collector(_collect_metrics)
+
+
+class _BatchRequest:
+    """A single clip waiting to be decoded as part of a batch"""
+
+    def __init__(self, audio):
+        self.audio = audio
+        self.text = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class InferenceBatcher:
+    """
+    Collects clips from concurrent callers and decodes them together
+
+    The first clip to arrive opens a batch; the batch is closed after
+    max_wait_ms or once max_batch_size clips have been collected, then the
+    whole batch runs through the encoder and decoder as one padded mel tensor.
     """
-    Transcribe audio file using Whisper
+
+    def __init__(self, max_batch_size=WHISPER_BATCH_SIZE, max_wait_ms=WHISPER_BATCH_WAIT_MS):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0, max_wait_ms) / 1000.0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="whisper-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, audio):
+        """
+        Queue a clip and block until its batch has been decoded
+
+        Args:
+            audio (np.ndarray): 16 kHz mono float32 audio, at most 30 seconds
+
+        Returns:
+            str: Transcribed text
+        """
+        request = _BatchRequest(audio)
+        self._queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.text
+
+    def _run(self):
+        """Batching loop: gather requests until the window closes, then decode"""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                texts = decode_batch([request.audio for request in batch])
+                for request, text in zip(batch, texts):
+                    request.text = text
+            except Exception as e:
+                logger.error(f"Error decoding batch of {len(batch)} clips: {str(e)}")
+                for request in batch:
+                    request.error = e
+            finally:
+                for request in batch:
+                    request.done.set()
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def get_batcher():
+    """Get or create the global inference batcher"""
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = InferenceBatcher()
+    return _batcher
+
+
+def decode_batch(audios):
+    """
+    Decode several short clips in a single forward pass
+
+    Args:
+        audios (list): 16 kHz mono float32 arrays, each at most 30 seconds
+
+    Returns:
+        list: Transcribed text for each clip, in input order
+    """
+    texts = get_model().decode_batch(audios)
+    logger.info(f"Decoded batch of {len(audios)} clips")
+    return texts
+
+
+def resample_audio(audio, orig_sr, target_sr=SAMPLE_RATE):
+    """
+    Resample mono float32 audio with a windowed-sinc low-pass and linear interpolation
+
+    Args:
+        audio (np.ndarray): Mono audio samples
+        orig_sr (int): Sample rate of the input
+        target_sr (int): Sample rate to resample to
+
+    Returns:
+        np.ndarray: Resampled float32 audio
+    """
+    if orig_sr == target_sr or len(audio) == 0:
+        return audio.astype(np.float32, copy=False)
+
+    # Low-pass below the target Nyquist frequency before downsampling
+    if orig_sr > target_sr:
+        cutoff = target_sr / orig_sr / 2
+        taps = np.arange(-32, 33)
+        kernel = 2 * cutoff * np.sinc(2 * cutoff * taps) * np.hanning(len(taps))
+        kernel /= kernel.sum()
+        audio = np.convolve(audio, kernel, mode="same")
+
+    duration = len(audio) / orig_sr
+    target_times = np.arange(int(duration * target_sr)) / target_sr
+    source_times = np.arange(len(audio)) / orig_sr
+    return np.interp(target_times, source_times, audio).astype(np.float32)
+
+
+def _run_ffmpeg(source, input_data=None):
+    """Run ffmpeg on a path (or "pipe:0" with input_data) and return 16 kHz mono float32 audio"""
+    cmd = [
+        "ffmpeg", "-nostdin", "-threads", "0",
+        "-i", source,
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(SAMPLE_RATE),
+        "pipe:1",
+    ]
+    try:
+        out = subprocess.run(cmd, input=input_data, capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Failed to decode audio: {e.stderr.decode(errors='ignore')}") from e
+    return np.frombuffer(out, np.int16).flatten().astype(np.float32) / 32768.0
+
+
+def _decode_with_ffmpeg(audio_data):
+    """
+    Decode audio with ffmpeg
+
+    Bytes are piped over stdin when possible. MP4/M4A files usually store
+    their index (the moov atom) at the end, which ffmpeg can only reach by
+    seeking, so they go through a temporary file, as does anything ffmpeg
+    fails to decode from the pipe.
+
+    Args:
+        audio_data (bytes or str): Encoded audio, or the path of a file holding it
+
+    Returns:
+        np.ndarray: 16 kHz mono float32 audio
+    """
+    if isinstance(audio_data, (str, Path)):
+        return _run_ffmpeg(str(audio_data))
+
+    # ISO base media files (mp4, m4a, mov) start with an ftyp box
+    if audio_data[4:8] != b"ftyp":
+        try:
+            return _run_ffmpeg("pipe:0", audio_data)
+        except RuntimeError as e:
+            logger.info(f"ffmpeg could not decode from a pipe, retrying from a file: {str(e)[:200]}")
+
+    # Closed before ffmpeg opens it: Windows does not let another process open a file held open here
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".audio")
+    try:
+        temp_file.write(audio_data)
+        temp_file.close()
+        return _run_ffmpeg(temp_file.name)
+    finally:
+        temp_file.close()
+        os.remove(temp_file.name)
+
+
+def _decode_file_with_ffmpeg(audio_file):
+    """
+    Decode a binary file with ffmpeg without reading it into memory
+
+    Files on disk (a finalized chunked upload) are passed to ffmpeg by path;
+    other streams, such as a request body, are spooled to a temporary file first.
+
+    Args:
+        audio_file: Seekable binary file holding encoded audio
+
+    Returns:
+        np.ndarray: 16 kHz mono float32 audio
+    """
+    path = getattr(audio_file, "name", None)
+    if isinstance(path, str) and os.path.isfile(path):
+        return _decode_with_ffmpeg(path)
+
+    audio_file.seek(0)
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".audio")
+    try:
+        shutil.copyfileobj(audio_file, temp_file)
+        temp_file.close()
+        return _decode_with_ffmpeg(temp_file.name)
+    finally:
+        temp_file.close()
+        os.remove(temp_file.name)
+
+
+@metrics_service.timed("decode")
+def decode_audio_bytes(audio_data):
+    """
+    Decode audio bytes in memory into a 16 kHz mono float32 array
+
+    Formats libsndfile understands (WAV, FLAC, OGG) are decoded in-process;
+    anything else goes through ffmpeg (files by path, never read into memory).
+
+    Args:
+        audio_data (bytes or file): Encoded audio, or a seekable binary file
+            holding it (an upload's stream or an open file on disk), which
+            is decoded without first copying it into memory
+
+    Returns:
+        np.ndarray: 16 kHz mono float32 audio
+    """
+    is_bytes = isinstance(audio_data, (bytes, bytearray))
+    try:
+        audio, sample_rate = sf.read(
+            io.BytesIO(audio_data) if is_bytes else audio_data, dtype="float32", always_2d=True
+        )
+    except Exception:
+        logger.info("Audio format not supported in-process, decoding with ffmpeg")
+        if not is_bytes:
+            return _decode_file_with_ffmpeg(audio_data)
+        return _decode_with_ffmpeg(audio_data)
+
+    # Mix down to mono and resample to the rate Whisper expects
+    audio = audio.mean(axis=1)
+    return resample_audio(audio, sample_rate)
+
+
+def find_quiet_point(audio, start, end):
+    """
+    Find the quietest place in audio[start:end] to cut a recording at
+
+    Args:
+        audio (np.ndarray): 16 kHz mono float32 audio
+        start (int): First sample of the search region
+        end (int): End of the search region
+
+    Returns:
+        int: Sample index in the middle of the lowest-energy VAD frame
+            (end if the region is shorter than one frame)
+    """
+    frame_length = int(VAD_FRAME_SECONDS * SAMPLE_RATE)
+    start, end = max(0, start), min(len(audio), end)
+    n_frames = (end - start) // frame_length
+    if n_frames == 0:
+        return end
+    frames = audio[start:start + n_frames * frame_length].reshape(n_frames, frame_length)
+    energy = np.einsum("ij,ij->i", frames, frames)
+    return start + int(np.argmin(energy)) * frame_length + frame_length // 2
+
+
+@metrics_service.timed("vad")
+def trim_silence(audio):
+    """
+    Energy-based voice activity trimming
+
+    Drops leading and trailing silence and shortens internal pauses longer
+    than WHISPER_VAD_MAX_GAP_SECONDS. A frame counts as speech when its
+    energy is both above WHISPER_VAD_MIN_DB and WHISPER_VAD_MARGIN_DB above
+    the clip's noise floor (10th percentile frame energy, capped so clips
+    without any pause still register as speech).
+
+    Args:
+        audio (np.ndarray): 16 kHz mono float32 audio
+
+    Returns:
+        tuple: (trimmed audio, stats dict with speech_detected and the
+            trimmed/removed durations in seconds)
+    """
+    frame_length = int(VAD_FRAME_SECONDS * SAMPLE_RATE)
+    n_frames = len(audio) // frame_length
+    stats = {
+        "speech_detected": False,
+        "audio_seconds": round(len(audio) / SAMPLE_RATE, 2),
+        "speech_seconds": 0.0,
+        "trimmed_seconds": 0.0,
+        "gap_seconds_removed": 0.0,
+    }
+    if n_frames == 0:
+        stats["trimmed_seconds"] = stats["audio_seconds"]
+        return audio[:0], stats
+
+    frames = audio[:n_frames * frame_length].reshape(n_frames, frame_length)
+    energy_db = 10 * np.log10(np.einsum("ij,ij->i", frames, frames) / frame_length + 1e-10)
+    noise_floor = np.percentile(energy_db, 10)
+    # For clips with no quiet frames the floor is speech itself, so measure from the peak
+    relative = min(noise_floor, energy_db.max() - 2 * WHISPER_VAD_MARGIN_DB) + WHISPER_VAD_MARGIN_DB
+    voiced = energy_db >= max(WHISPER_VAD_MIN_DB, relative)
+
+    min_speech_frames = int(VAD_MIN_SPEECH_SECONDS / VAD_FRAME_SECONDS)
+    if voiced.sum() < min_speech_frames:
+        stats["trimmed_seconds"] = stats["audio_seconds"]
+        return audio[:0], stats
+
+    # Pad speech on both sides so word onsets and tails are not clipped
+    pad = int(VAD_PAD_SECONDS / VAD_FRAME_SECONDS)
+    keep = np.convolve(voiced, np.ones(2 * pad + 1), mode="same") > 0
+
+    # Leading and trailing silence is dropped entirely
+    voiced_idx = np.flatnonzero(keep)
+    first, last = voiced_idx[0], voiced_idx[-1]
+    keep[:first] = False
+    keep[last + 1:] = False
+
+    # Internal pauses longer than the max gap keep only max_gap of silence
+    max_gap = int(WHISPER_VAD_MAX_GAP_SECONDS / VAD_FRAME_SECONDS)
+    half_gap = max_gap // 2
+    removed_gap_frames = 0
+    silent_runs = np.flatnonzero(np.diff(keep[first:last + 1].astype(np.int8))) + first + 1
+    for run_start, run_end in zip(silent_runs[::2], silent_runs[1::2]):
+        if run_end - run_start > max_gap:
+            keep[run_start:run_end] = True
+            keep[run_start + half_gap:run_end - (max_gap - half_gap)] = False
+            removed_gap_frames += run_end - run_start - max_gap
+        else:
+            keep[run_start:run_end] = True
+
+    sample_mask = np.zeros(len(audio), dtype=bool)
+    sample_mask[:n_frames * frame_length] = np.repeat(keep, frame_length)
+    trimmed = audio[sample_mask]
+
+    stats["speech_detected"] = True
+    stats["speech_seconds"] = round(float(voiced.sum()) * VAD_FRAME_SECONDS, 2)
+    stats["gap_seconds_removed"] = round(float(removed_gap_frames) * VAD_FRAME_SECONDS, 2)
+    stats["trimmed_seconds"] = round(
+        (len(audio) - len(trimmed)) / SAMPLE_RATE - stats["gap_seconds_removed"], 2
+    )
+    return trimmed, stats
+
+
+def split_at_silence(audio, segment_seconds=WHISPER_SEGMENT_SECONDS,
+                     overlap_seconds=WHISPER_SEGMENT_OVERLAP_SECONDS):
+    """
+    Cut a long recording into segments at quiet points
+
+    Each cut is placed at the quietest frame within SEGMENT_SEARCH_SECONDS
+    before a segment_seconds boundary, and every segment after the first
+    starts overlap_seconds early so a word spoken across a cut is heard whole.
+
+    Args:
+        audio (np.ndarray): 16 kHz mono float32 audio
+        segment_seconds (float): Target segment length
+        overlap_seconds (float): Audio repeated at the start of each segment
+
+    Returns:
+        list: (start, end) sample ranges covering the whole recording, in order
+    """
+    segment = int(segment_seconds * SAMPLE_RATE)
+    search = min(int(SEGMENT_SEARCH_SECONDS * SAMPLE_RATE), segment // 2)
+    overlap = int(overlap_seconds * SAMPLE_RATE)
+
+    ranges = []
+    start = 0
+    while len(audio) - start > segment:
+        cut = find_quiet_point(audio, start + segment - search, start + segment)
+        ranges.append((max(0, start - overlap) if ranges else start, cut))
+        start = cut
+    ranges.append((max(0, start - overlap) if ranges else start, len(audio)))
+    return ranges
+
+
+def _normalize_words(text):
+    """Lowercase words with punctuation stripped, for comparing overlapping text"""
+    return [word.strip(".,;:!?\"'()-").lower() for word in text.split()]
+
+
+def _strip_overlap(previous, text):
+    """
+    Drop the words at the start of text that repeat the end of previous
+
+    At least OVERLAP_MIN_WORDS must match: a single shared word ("no." then
+    "No, he said") is usually a coincidence rather than re-transcribed audio.
+
+    Args:
+        previous (str): Transcript of the preceding segment
+        text (str): Transcript of the next segment, which began overlap_seconds early
+
+    Returns:
+        str: text without the longest (OVERLAP_MIN_WORDS to OVERLAP_MAX_WORDS) repeated prefix
+    """
+    tail = _normalize_words(previous)[-OVERLAP_MAX_WORDS:]
+    words = text.split()
+    head = _normalize_words(text)[:OVERLAP_MAX_WORDS]
+    for size in range(min(len(tail), len(head)), OVERLAP_MIN_WORDS - 1, -1):
+        if tail[-size:] == head[:size]:
+            return " ".join(words[size:])
+    return text
+
+
+# Process pool for long-audio mode (lazy, one model copy per worker process)
+_segment_pool = None
+_segment_pool_lock = threading.Lock()
+
+# The engine owned by this process when it is a segment pool worker
+_worker_engine = None
+
+
+def _init_segment_worker(engine_class, model_name, threads):
+    """Pool initializer: load the model once per worker, sharing the CPU cores between workers"""
+    global _worker_engine
+    torch.set_num_threads(threads)
+    engine = engine_class(model_name)
+    if hasattr(engine, "cpu_threads"):
+        engine.cpu_threads = threads
+    engine.load()
+    _worker_engine = engine
+
+
+def _transcribe_segment(audio):
+    """Transcribe one segment on a pool worker's model"""
+    return _worker_engine.transcribe(audio)
+
+
+def get_segment_pool():
+    """
+    Get or create the process pool used for long recordings
+
+    Workers are started with "spawn" so none of them inherits the parent's
+    torch threads or loaded model; each loads its own copy on start.
+    """
+    global _segment_pool
+    if _segment_pool is None:
+        with _segment_pool_lock:
+            if _segment_pool is None:
+                engine_class = type(create_engine(WHISPER_MODEL))
+                threads = max(1, (os.cpu_count() or 1) // WHISPER_POOL_WORKERS)
+                logger.info(
+                    f"Starting {WHISPER_POOL_WORKERS} transcription workers "
+                    f"({WHISPER_MODEL}, {threads} threads each)"
+                )
+                _segment_pool = ProcessPoolExecutor(
+                    max_workers=WHISPER_POOL_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_segment_worker,
+                    initargs=(engine_class, WHISPER_MODEL, threads),
+                )
+    return _segment_pool
+
+
+def transcribe_long_audio(audio):
+    """
+    Transcribe a long recording as parallel segments and stitch the text
+
+    Args:
+        audio (np.ndarray): 16 kHz mono float32 audio
+
+    Returns:
+        str: Transcript of the whole recording
+    """
+    global _segment_pool
+    ranges = split_at_silence(audio)
+    logger.info(
+        f"Long-audio mode: {len(audio) / SAMPLE_RATE:.0f}s in {len(ranges)} segments "
+        f"on {WHISPER_POOL_WORKERS} workers"
+    )
+    pool = get_segment_pool()
+    try:
+        texts = list(pool.map(_transcribe_segment, [audio[start:end] for start, end in ranges]))
+    except BrokenProcessPool as e:
+        # A worker died (usually while loading the model); start a fresh pool next time
+        logger.error(f"Transcription worker pool failed: {str(e)}")
+        with _segment_pool_lock:
+            if _segment_pool is pool:
+                _segment_pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+
+    transcript = []
+    for text in texts:
+        if transcript:
+            text = _strip_overlap(transcript[-1], text)
+        if text:
+            transcript.append(text)
+    return " ".join(transcript)
+
+
+def transcription_cache_key(audio, draft=False):
+    """
+    Build the cache key for a decoded clip
+
+    Args:
+        audio (np.ndarray): 16 kHz mono float32 audio
+        draft (bool): Whether the key is for the draft model
+
+    Returns:
+        str: SHA-256 of the PCM samples, model name and decode options
+    """
+    digest = hashlib.sha256(np.ascontiguousarray(audio, dtype=np.float32).tobytes())
+    model_name = WHISPER_DRAFT_MODEL if draft and WHISPER_DRAFT_MODEL else WHISPER_MODEL
+    options = (
+        f"{WHISPER_ENGINE}:{WHISPER_COMPUTE_TYPE}|{model_name}|"
+        f"vad={WHISPER_VAD}:{WHISPER_VAD_MIN_DB}:{WHISPER_VAD_MARGIN_DB}:{WHISPER_VAD_MAX_GAP_SECONDS}|"
+        f"batching={WHISPER_BATCHING and not draft}"
+    )
+    digest.update(options.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def get_cache_stats():
+    """Report transcription cache hit/miss counters"""
+    return _transcription_cache.stats()
+
+
+def transcribe_audio(audio):
+    """
+    Transcribe audio using Whisper
     
     Args:
-        audio_file_path (str): Path to the audio file
+        audio (str or np.ndarray): Path to the audio file, or 16 kHz mono float32 audio
         
     Returns:
         str: Transcribed text
     """
-    try:
-        logger.info(f"Transcribing audio file: {audio_file_path}")
-        
-        # Get the model
-        model = get_model()
+    return transcribe_audio_with_details(audio)["transcription"]
+
+
+def transcribe_audio_with_details(audio, draft=False):
+    """
+    Transcribe audio using Whisper, reporting voice activity statistics
+    
+    Args:
+        audio (str or np.ndarray): Path to the audio file, or 16 kHz mono float32 audio
+        draft (bool): Use the small draft model (WHISPER_DRAFT_MODEL) instead
         
-        # Transcribe the audio
-        result = model.transcribe(audio_file_path)
+    Returns:
+        dict: transcription text, speech_detected flag and VAD stats (None when VAD is off)
+    """
+    try:
+        if isinstance(audio, np.ndarray):
+            logger.info(f"Transcribing {len(audio) / SAMPLE_RATE:.1f}s of in-memory audio")
+        else:
+            logger.info(f"Transcribing audio file: {audio}")
         
-        # Extract the transcribed text
-        transcription = result["text"].strip()
+        # Return cached results for audio we have already transcribed
+        cache_key = None
+        if WHISPER_CACHE:
+            if not isinstance(audio, np.ndarray):
+                audio = whisper.load_audio(audio)
+            cache_key = transcription_cache_key(audio, draft)
+            cached = _transcription_cache.get(cache_key)
+            if cached is not None:
+                logger.info("Transcription cache hit")
+                return dict(cached, cached=True)
         
-        logger.info("Transcription completed successfully")
-        return transcription
+        result = _run_transcription(audio, draft)
+        if cache_key is not None:
+            _transcription_cache.set(cache_key, result)
+        return result
     
     except Exception as e:
         logger.error(f"Error transcribing audio: {str(e)}")
+        metrics_service.record_error("transcribe", e)
+        raise
+
+
+def _run_transcription(audio, draft=False):
+    """Trim silence and run the model; the uncached part of transcribe_audio_with_details"""
+    input_seconds = len(audio) / SAMPLE_RATE if isinstance(audio, np.ndarray) else None
+    model = "draft" if draft else "main"
+
+    # Trim silence and skip the model entirely when there is no speech
+    vad = None
+    if WHISPER_VAD:
+        if not isinstance(audio, np.ndarray):
+            audio = whisper.load_audio(audio)
+            input_seconds = len(audio) / SAMPLE_RATE
+        audio, vad = trim_silence(audio)
+        logger.info(f"VAD: {vad}")
+        if not vad["speech_detected"]:
+            logger.info("No speech detected, skipping transcription")
+            metrics_service.record_transcription(model, input_seconds, 0, 0)
+            return {"transcription": "", "speech_detected": False, "vad": vad}
+    
+    started = time.perf_counter()
+
+    # Draft passes are cheap; run them directly on the draft model
+    if draft:
+        transcription = get_draft_model().transcribe(audio)
+        _record_transcription_metrics(model, input_seconds, audio, started)
+        logger.info("Draft transcription completed successfully")
+        return {"transcription": transcription, "speech_detected": True, "vad": vad}
+    
+    # Long recordings are split at silence and spread across the worker pool
+    if WHISPER_POOL_WORKERS > 0:
+        if not isinstance(audio, np.ndarray):
+            audio = whisper.load_audio(audio)
+            input_seconds = len(audio) / SAMPLE_RATE
+        if len(audio) > WHISPER_LONG_AUDIO_SECONDS * SAMPLE_RATE:
+            transcription = transcribe_long_audio(audio)
+            _record_transcription_metrics(model, input_seconds, audio, started)
+            logger.info("Long-audio transcription completed successfully")
+            return {"transcription": transcription, "speech_detected": True, "vad": vad}
+
+    # Short clips go through the batcher when batching is enabled
+    if WHISPER_BATCHING:
+        if not isinstance(audio, np.ndarray):
+            audio = whisper.load_audio(audio)
+            input_seconds = len(audio) / SAMPLE_RATE
+        if len(audio) <= whisper.audio.N_SAMPLES:
+            transcription = get_batcher().submit(audio)
+            _record_transcription_metrics(model, input_seconds, audio, started)
+            logger.info("Transcription completed successfully")
+            return {"transcription": transcription, "speech_detected": True, "vad": vad}
+    
+    # Get the engine and transcribe the audio
+    transcription = get_model().transcribe(audio)
+    _record_transcription_metrics(model, input_seconds, audio, started)
+    
+    logger.info("Transcription completed successfully")
+    return {"transcription": transcription, "speech_detected": True, "vad": vad}
+
+
+def _record_transcription_metrics(model, input_seconds, audio, started):
+    """Record model time, audio seconds and real-time factor for one transcription"""
+    elapsed = time.perf_counter() - started
+    metrics_service.observe_stage("transcribe", elapsed)
+    # Durations are unknown when the engine was handed a file path
+    if input_seconds is not None and isinstance(audio, np.ndarray):
+        metrics_service.record_transcription(model, input_seconds, len(audio) / SAMPLE_RATE, elapsed)
+
+
+class StreamingTranscriber:
+    """
+    Keeps a rolling transcript of a recording that is still in progress
+
+    Windows passed to submit_window() are transcribed in order on a
+    background thread, so by the time recording stops only the final
+    partial window is left to decode.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self._texts = []
+        self._queue = queue.Queue()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="whisper-stream", daemon=True)
+        self._thread.start()
+
+    def submit_window(self, audio):
+        """Queue a finished window of audio for background transcription"""
+        logger.info(f"Streaming window queued: {len(audio) / self.sample_rate:.1f}s")
+        self._queue.put(audio)
+
+    def transcript(self):
+        """Text transcribed so far"""
+        return " ".join(text for text in self._texts if text)
+
+    def finish(self, tail_audio=None):
+        """
+        Transcribe the final partial window and return the full transcript
+
+        Args:
+            tail_audio (np.ndarray): Audio recorded after the last submitted window
+
+        Returns:
+            str: Transcript of the whole recording
+        """
+        if tail_audio is not None and len(tail_audio):
+            self._queue.put(tail_audio)
+        self._queue.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return self.transcript()
+
+    def _run(self):
+        """Transcribe queued windows in order until finish() is called"""
+        while True:
+            audio = self._queue.get()
+            if audio is None:
+                return
+            if self._error is not None:
+                continue
+            try:
+                self._texts.append(transcribe_audio(resample_audio(audio, self.sample_rate)))
+            except Exception as e:
+                self._error = e
+
+
+def transcribe_audio_bytes(audio_data):
+    """
+    Decode audio bytes in memory and transcribe them
+    
+    Args:
+        audio_data (bytes or file): Encoded audio, as uploaded, or a seekable
+            binary file holding it
+        
+    Returns:
+        dict: transcription text, speech_detected flag and VAD stats
+    """
+    try:
+        audio = decode_audio_bytes(audio_data)
+    except Exception as e:
+        metrics_service.record_error("decode", e)
         raise
+    return transcribe_audio_with_details(audio)
 
 
+@metrics_service.timed("upload_save")
 def save_audio_file(audio_data, file_extension=".wav"):
     """
     Save audio data to a temporary file
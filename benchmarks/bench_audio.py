@@ -0,0 +1,51 @@
+"""
+Benchmarks for upload decode/save, voice activity trimming and cache keys
+"""
+
+import numpy as np
+
+import whisper_service
+from conftest import SAMPLE_RATE, record_allocations, synthetic_speech, wav_bytes
+
+
+def bench_decode_wav_bytes(benchmark, speech_audio):
+    data = wav_bytes(speech_audio)
+    record_allocations(benchmark, whisper_service.decode_audio_bytes, data)
+    audio = benchmark(whisper_service.decode_audio_bytes, data)
+    assert len(audio) == len(speech_audio)
+
+
+def bench_decode_and_resample_44k(benchmark):
+    data = wav_bytes(synthetic_speech(30, sample_rate=44100), sample_rate=44100)
+    record_allocations(benchmark, whisper_service.decode_audio_bytes, data)
+    benchmark(whisper_service.decode_audio_bytes, data)
+
+
+def bench_save_audio_file(benchmark, speech_audio, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    data = wav_bytes(speech_audio)
+
+    def save_and_cleanup():
+        path = whisper_service.save_audio_file(data)
+        whisper_service.cleanup_audio_file(path)
+
+    record_allocations(benchmark, save_and_cleanup)
+    benchmark(save_and_cleanup)
+
+
+def bench_trim_silence(benchmark, speech_audio):
+    record_allocations(benchmark, whisper_service.trim_silence, speech_audio)
+    trimmed, stats = benchmark(whisper_service.trim_silence, speech_audio)
+    assert stats["speech_detected"]
+    benchmark.extra_info["trimmed_seconds"] = stats["trimmed_seconds"]
+
+
+def bench_transcription_cache_key(benchmark, speech_audio):
+    benchmark(whisper_service.transcription_cache_key, speech_audio)
+
+
+def bench_silence_short_circuit(benchmark, stub_whisper, monkeypatch):
+    monkeypatch.setattr(stub_whisper, "WHISPER_VAD", True)
+    silence = np.zeros(30 * SAMPLE_RATE, dtype=np.float32)
+    result = benchmark(stub_whisper.transcribe_audio_with_details, silence)
+    assert not result["speech_detected"]
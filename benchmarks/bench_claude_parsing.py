@@ -0,0 +1,36 @@
+"""
+Benchmarks for caption response parsing and cache-key hashing
+"""
+
+import pytest
+
+import claude_service
+from conftest import CANNED_RESPONSE, CANNED_LONG_RESPONSE, record_allocations
+
+
+@pytest.mark.parametrize("response", [CANNED_RESPONSE, CANNED_LONG_RESPONSE], ids=["short", "long"])
+def bench_parse_claude_response(benchmark, response):
+    record_allocations(benchmark, claude_service.parse_claude_response, response)
+    sections = benchmark(claude_service.parse_claude_response, response)
+    assert sections["formatted_caption"]
+
+
+@pytest.mark.parametrize("chunk_size", [4, 32], ids=["token", "chunk"])
+def bench_stream_parser(benchmark, chunk_size):
+    chunks = [CANNED_LONG_RESPONSE[i:i + chunk_size] for i in range(0, len(CANNED_LONG_RESPONSE), chunk_size)]
+
+    def parse_stream():
+        parser = claude_service.CaptionStreamParser()
+        for chunk in chunks:
+            parser.feed(chunk)
+        parser.close()
+        return parser.sections
+
+    record_allocations(benchmark, parse_stream)
+    sections = benchmark(parse_stream)
+    assert sections["missing_information"]
+
+
+def bench_caption_cache_key(benchmark):
+    transcription = "A pelican walks past a man reading a book in St James's Park, London. " * 20
+    benchmark(claude_service.caption_cache_key, transcription)
@@ -0,0 +1,32 @@
+"""
+Benchmarks for the end-to-end request path with a stub Whisper engine and
+canned Claude responses, isolating the framework overhead around inference
+"""
+
+import pipeline_service
+from conftest import record_allocations, wav_bytes
+
+
+def bench_transcribe_audio_bytes(benchmark, stub_whisper, speech_audio):
+    data = wav_bytes(speech_audio)
+    record_allocations(benchmark, stub_whisper.transcribe_audio_bytes, data)
+    result = benchmark(stub_whisper.transcribe_audio_bytes, data)
+    assert result["speech_detected"]
+
+
+def bench_generate_caption(benchmark, canned_claude):
+    transcription = "A pelican walks past a man reading a book in St James's Park, London."
+    record_allocations(benchmark, canned_claude.generate_caption, transcription)
+    caption = benchmark(canned_claude.generate_caption, transcription)
+    assert caption["formatted_caption"]
+
+
+def bench_caption_from_audio(benchmark, stub_whisper, canned_claude, speech_audio):
+    data = wav_bytes(speech_audio)
+
+    def run():
+        return pipeline_service.caption_from_audio(lambda: stub_whisper.transcribe_audio_bytes(data))
+
+    record_allocations(benchmark, run)
+    result = benchmark(run)
+    assert result["formatted_caption"]
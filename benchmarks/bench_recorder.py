@@ -0,0 +1,35 @@
+"""
+Benchmarks for AudioRecorder capture buffering
+"""
+
+import pytest
+
+from conftest import SAMPLE_RATE, record_allocations, synthetic_speech
+
+# sounddevice needs the PortAudio shared library even when no device is used
+try:
+    from audio_recorder import AudioRecorder
+except OSError as e:
+    pytest.skip(f"audio_recorder unavailable: {e}", allow_module_level=True)
+
+# sounddevice delivers audio in blocks of this many frames
+CALLBACK_BLOCK = 512
+
+
+@pytest.mark.parametrize("seconds", [60, 600], ids=["1min", "10min"])
+def bench_recorder_buffering(benchmark, seconds):
+    block = synthetic_speech(1)[:CALLBACK_BLOCK].reshape(-1, 1)
+    n_blocks = seconds * SAMPLE_RATE // CALLBACK_BLOCK
+
+    def record():
+        recorder = AudioRecorder()
+        recorder._allocate_buffer()
+        recorder.is_recording = True
+        for _ in range(n_blocks):
+            recorder._audio_callback(block, CALLBACK_BLOCK, None, None)
+        recorder.is_recording = False
+        return recorder._buffer[:recorder._frames]
+
+    record_allocations(benchmark, record)
+    audio = benchmark.pedantic(record, rounds=5)
+    assert len(audio) == n_blocks * CALLBACK_BLOCK
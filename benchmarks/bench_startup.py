@@ -0,0 +1,12 @@
+"""
+Benchmark for the cold-start path: importing the Flask app in a fresh
+interpreter, which must not pull in torch, whisper or the Anthropic SDK
+"""
+
+from import_time import heavy_modules_loaded, measure_import
+
+
+def bench_import_app(benchmark):
+    report = benchmark.pedantic(measure_import, args=("app",), rounds=3, iterations=1)
+    benchmark.extra_info["import_ms"] = report["total_ms"]
+    assert not heavy_modules_loaded(report)
@@ -0,0 +1,127 @@
+"""
+Shared fixtures for the backend microbenchmarks
+
+Everything runs offline: audio is synthetic, the Whisper engine is a stub
+and Claude responses are canned strings.
+"""
+
+import io
+import sys
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+# Make the backend modules importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+SAMPLE_RATE = 16000
+
+# Clip lengths (seconds) used for parametrized audio benchmarks
+AUDIO_LENGTHS = [5, 30, 120]
+
+CANNED_RESPONSE = """REUTERS FORMATTED CAPTION:
+A pelican walks past a man reading a book in St James's Park during a heatwave, in London, Britain, August 12, 2025. REUTERS/Jack Taylor
+
+MISSING INFORMATION NEEDED:
+- What is the name of the man reading the book?
+- Can you confirm the time of day the photograph was taken?
+- No additional material needed for the location
+"""
+
+CANNED_LONG_RESPONSE = CANNED_RESPONSE + "\n".join(
+    f"{i}. Can you provide detail number {i} about the scene?" for i in range(1, 41)
+)
+
+
+def synthetic_speech(seconds, sample_rate=SAMPLE_RATE, seed=0):
+    """
+    Speech-like test audio: bursts of modulated tones separated by pauses,
+    with a low noise floor and a second of silence at each end
+    """
+    rng = np.random.default_rng(seed)
+    n = int(seconds * sample_rate)
+    t = np.arange(n) / sample_rate
+    carrier = np.sin(2 * np.pi * 220 * t) + 0.5 * np.sin(2 * np.pi * 660 * t)
+    syllables = (np.sin(2 * np.pi * 3 * t) > 0).astype(np.float32)
+    phrases = (np.sin(2 * np.pi * 0.2 * t) > -0.5).astype(np.float32)
+    audio = 0.2 * carrier * syllables * phrases + 1e-4 * rng.standard_normal(n)
+    audio[:sample_rate] = 1e-4 * rng.standard_normal(sample_rate)
+    audio[-sample_rate:] = 1e-4 * rng.standard_normal(sample_rate)
+    return audio.astype(np.float32)
+
+
+def wav_bytes(audio, sample_rate=SAMPLE_RATE):
+    """Encode audio as an in-memory 16-bit WAV file"""
+    buffer = io.BytesIO()
+    sf.write(buffer, audio, sample_rate, format="WAV", subtype="PCM_16")
+    return buffer.getvalue()
+
+
+class StubEngine:
+    """Stands in for a Whisper engine; returns fixed text without inference"""
+
+    name = "stub"
+
+    def __init__(self, text="A pelican walks past a man reading a book in London."):
+        self.text = text
+
+    def info(self):
+        return {"engine": self.name, "model": "stub", "device": "cpu", "compute_type": None}
+
+    def transcribe(self, audio):
+        return self.text
+
+    def decode_batch(self, audios):
+        return [self.text for _ in audios]
+
+
+def record_allocations(benchmark, func, *args, **kwargs):
+    """
+    Run func once under tracemalloc and attach peak/total allocated bytes
+    to the benchmark's saved results
+    """
+    tracemalloc.start()
+    try:
+        func(*args, **kwargs)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    benchmark.extra_info["alloc_peak_bytes"] = peak
+    benchmark.extra_info["alloc_retained_bytes"] = current
+
+
+@pytest.fixture(params=AUDIO_LENGTHS, ids=lambda seconds: f"{seconds}s")
+def speech_audio(request):
+    """Synthetic 16 kHz speech-like audio at several lengths"""
+    return synthetic_speech(request.param)
+
+
+@pytest.fixture
+def stub_whisper(monkeypatch):
+    """Install a stub engine in whisper_service and disable the caches"""
+    import whisper_service
+
+    monkeypatch.setattr(whisper_service, "_model", StubEngine())
+    monkeypatch.setattr(whisper_service, "WHISPER_CACHE", False)
+    monkeypatch.setattr(whisper_service, "WHISPER_BATCHING", False)
+    return whisper_service
+
+
+@pytest.fixture
+def canned_claude(monkeypatch):
+    """Replace the LLM call in claude_service with a canned response"""
+    import claude_service
+
+    usage = {
+        "input_tokens": 120,
+        "output_tokens": 80,
+        "cache_read_input_tokens": 1800,
+        "cache_creation_input_tokens": 0,
+    }
+    monkeypatch.setattr(claude_service, "create_message", lambda messages: (CANNED_RESPONSE, usage))
+    monkeypatch.setattr(claude_service, "CAPTION_CACHE", False)
+    monkeypatch.setattr(claude_service, "LLM_ASYNC", False)
+    return claude_service
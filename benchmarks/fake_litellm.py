@@ -0,0 +1,311 @@
+"""
+Fake LiteLLM proxy for load testing
+
+Serves the Anthropic Messages API (POST /v1/messages, plain and streaming)
+with a canned Reuters caption, a configurable latency distribution and
+error rate. Point LITELLM_API_URL at it to exercise the caption path
+without spending real tokens.
+
+Run standalone:
+    python fake_litellm.py --port 4010 --latency-ms 1200 --error-rate 0.02
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CANNED_CAPTION = """REUTERS FORMATTED CAPTION:
+A pelican walks past a man reading a book in St James's Park during a heatwave, in London, Britain, August 12, 2025. REUTERS/Jack Taylor
+
+MISSING INFORMATION NEEDED:
+- What is the name of the man reading the book?
+- Can you confirm the time of day the photograph was taken?
+- No additional material needed for the location
+"""
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+
+
+class FakeLLMConfig:
+    """
+    Behaviour of the fake server
+
+    Args:
+        latency_ms (float): Median time before the response (or first token) starts
+        latency_dist (str): "fixed", "uniform" (latency_ms +/- spread fraction)
+            or "lognormal" (spread is sigma of the underlying normal)
+        latency_spread (float): Width of the latency distribution
+        chunk_chars (int): Characters per streamed text delta
+        chunk_delay_ms (float): Delay between streamed deltas; plain responses
+            wait for the equivalent generation time before returning
+        error_rate (float): Fraction of requests answered with an error
+        error_status (int): HTTP status used for injected errors
+        response_text (str): Assistant text returned for every request
+        seed (int): Seed for the latency and error draws
+    """
+
+    def __init__(self, latency_ms=800, latency_dist="lognormal", latency_spread=0.4,
+                 chunk_chars=16, chunk_delay_ms=15, error_rate=0.0, error_status=529,
+                 response_text=CANNED_CAPTION, seed=None):
+        if latency_dist not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {latency_dist}")
+        self.latency_ms = latency_ms
+        self.latency_dist = latency_dist
+        self.latency_spread = latency_spread
+        self.chunk_chars = max(1, chunk_chars)
+        self.chunk_delay_ms = chunk_delay_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.response_text = response_text
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample_latency(self):
+        """Draw one initial latency in seconds"""
+        with self._lock:
+            if self.latency_dist == "fixed":
+                ms = self.latency_ms
+            elif self.latency_dist == "uniform":
+                ms = self.latency_ms * self._random.uniform(
+                    1 - self.latency_spread, 1 + self.latency_spread
+                )
+            else:
+                ms = self.latency_ms * self._random.lognormvariate(0, self.latency_spread)
+        return max(ms, 0) / 1000
+
+    def should_fail(self):
+        """Decide whether the next request gets an injected error"""
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def chunks(self):
+        """Split the response text into streamed deltas"""
+        text = self.response_text
+        return [text[i:i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)]
+
+
+def estimate_tokens(value):
+    """Rough token count (about 4 characters per token) of a request field"""
+    if isinstance(value, str):
+        return max(1, len(value) // 4)
+    if isinstance(value, list):
+        return sum(estimate_tokens(item) for item in value)
+    if isinstance(value, dict):
+        return sum(estimate_tokens(item) for key, item in value.items() if key != "cache_control")
+    return 0
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the fake's config and request counters"""
+
+    daemon_threads = True
+    protocol_version = "HTTP/1.1"
+
+    def __init__(self, address, config):
+        super().__init__(address, FakeLLMHandler)
+        self.config = config
+        self.stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "streamed": 0, "errors": 0}
+        # System prompts seen so far, to report prompt-cache reads like the real API
+        self.cached_prefixes = set()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, key):
+        with self.stats_lock:
+            self.stats[key] += 1
+
+    def cache_usage(self, system):
+        """Return (cache_creation, cache_read) tokens for a system prompt"""
+        tokens = estimate_tokens(system)
+        key = hashlib.sha256(json.dumps(system, sort_keys=True).encode()).hexdigest()
+        with self.stats_lock:
+            if key in self.cached_prefixes:
+                return 0, tokens
+            self.cached_prefixes.add(key)
+            return tokens, 0
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    """Handles /v1/messages the way the Anthropic API (behind LiteLLM) does"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip("/") in ("/health", "/stats"):
+            with self.server.stats_lock:
+                self._send_json(200, dict(self.server.stats))
+        else:
+            self._send_json(404, {"type": "error", "error": {"type": "not_found_error", "message": "Not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+
+        if not self.path.split("?")[0].endswith("/v1/messages"):
+            self._send_json(404, {"type": "error", "error": {"type": "not_found_error", "message": "Not found"}})
+            return
+
+        config = self.server.config
+        self.server.count("requests")
+        time.sleep(config.sample_latency())
+
+        if config.should_fail():
+            self.server.count("errors")
+            self._send_json(config.error_status, {
+                "type": "error",
+                "error": {"type": "overloaded_error", "message": "Injected failure from fake LiteLLM"},
+            })
+            return
+
+        cache_creation, cache_read = self.server.cache_usage(body.get("system", ""))
+        usage = {
+            "input_tokens": estimate_tokens(body.get("messages", [])),
+            "output_tokens": estimate_tokens(config.response_text),
+            "cache_creation_input_tokens": cache_creation,
+            "cache_read_input_tokens": cache_read,
+        }
+        message = {
+            "id": f"msg_{uuid.uuid4().hex[:24]}",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "fake"),
+            "content": [{"type": "text", "text": config.response_text}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": usage,
+        }
+
+        if body.get("stream"):
+            self.server.count("streamed")
+            self._stream_message(message, config)
+        else:
+            time.sleep(len(config.chunks()) * config.chunk_delay_ms / 1000)
+            self._send_json(200, message)
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _write_chunk(self, data):
+        """Write one HTTP/1.1 chunk so streamed responses keep the connection alive"""
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _stream_message(self, message, config):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def event(name, data):
+            self._write_chunk(f"event: {name}\ndata: {json.dumps(data)}\n\n".encode())
+
+        usage = message["usage"]
+        start = dict(message, content=[], stop_reason=None, usage=dict(usage, output_tokens=1))
+        event("message_start", {"type": "message_start", "message": start})
+        event("content_block_start", {
+            "type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""},
+        })
+        for i, text in enumerate(config.chunks()):
+            if i:
+                time.sleep(config.chunk_delay_ms / 1000)
+            event("content_block_delta", {
+                "type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": text},
+            })
+        event("content_block_stop", {"type": "content_block_stop", "index": 0})
+        event("message_delta", {
+            "type": "message_delta",
+            "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+            "usage": {"output_tokens": usage["output_tokens"]},
+        })
+        event("message_stop", {"type": "message_stop"})
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+def start_fake_server(config=None, host="127.0.0.1", port=0):
+    """
+    Start the fake server on a background thread
+
+    Args:
+        config (FakeLLMConfig): Server behaviour (defaults if omitted)
+        host (str): Interface to bind
+        port (int): Port to bind (0 picks a free port)
+
+    Returns:
+        FakeLLMServer: Running server; call shutdown() to stop it
+    """
+    server = FakeLLMServer((host, port), config or FakeLLMConfig())
+    thread = threading.Thread(target=server.serve_forever, name="fake-litellm", daemon=True)
+    thread.start()
+    return server
+
+
+def add_config_arguments(parser):
+    """Add the fake server's behaviour options to an argument parser"""
+    group = parser.add_argument_group("fake LiteLLM server")
+    group.add_argument("--latency-ms", type=float, default=800,
+                       help="median latency before the response or first token (default: 800)")
+    group.add_argument("--latency-dist", choices=LATENCY_DISTRIBUTIONS, default="lognormal",
+                       help="latency distribution (default: lognormal)")
+    group.add_argument("--latency-spread", type=float, default=0.4,
+                       help="lognormal sigma, or +/- fraction for uniform (default: 0.4)")
+    group.add_argument("--chunk-chars", type=int, default=16,
+                       help="characters per streamed delta (default: 16)")
+    group.add_argument("--chunk-delay-ms", type=float, default=15,
+                       help="delay between streamed deltas (default: 15)")
+    group.add_argument("--error-rate", type=float, default=0.0,
+                       help="fraction of requests that fail (default: 0)")
+    group.add_argument("--error-status", type=int, default=529,
+                       help="HTTP status of injected failures (default: 529 overloaded)")
+    group.add_argument("--seed", type=int, default=None, help="random seed")
+
+
+def config_from_args(args):
+    """Build a FakeLLMConfig from parsed add_config_arguments options"""
+    return FakeLLMConfig(
+        latency_ms=args.latency_ms,
+        latency_dist=args.latency_dist,
+        latency_spread=args.latency_spread,
+        chunk_chars=args.chunk_chars,
+        chunk_delay_ms=args.chunk_delay_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Anthropic-compatible LiteLLM proxy")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4010)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    server = FakeLLMServer((args.host, args.port), config_from_args(args))
+    print(f"Fake LiteLLM listening on {server.url} (set LITELLM_API_URL to this)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
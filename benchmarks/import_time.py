@@ -0,0 +1,141 @@
+"""
+Import-time breakdown for the backend
+
+Imports a backend module in a fresh interpreter under `python -X importtime`
+and reports where the time went: the module's direct imports by cumulative
+time and the slowest individual modules by self time. It also checks that
+none of the heavy modules (torch, whisper, the Anthropic SDK) were pulled in,
+since `import app` has to stay cheap for the launcher window to appear quickly.
+
+    python import_time.py                        # breakdown of `import app`
+    python import_time.py --module whisper_service --forbid
+    python import_time.py --budget-ms 1500       # exit 1 on a slower import (CI check)
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+# Modules `import app` must not load; they are imported on first use or in the background
+HEAVY_MODULES = ("torch", "whisper", "faster_whisper", "anthropic")
+
+
+def parse_importtime(output):
+    """
+    Parse `-X importtime` output
+
+    Args:
+        output (str): The interpreter's stderr
+
+    Returns:
+        list: One dict per import (name, depth, self_ms, cumulative_ms) in the
+            order printed, where each module follows the modules it imported
+    """
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        package = name.rstrip()[1:]
+        stripped = package.lstrip()
+        imports.append({
+            "name": stripped,
+            "depth": (len(package) - len(stripped)) // 2,
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+        })
+    return imports
+
+
+def measure_import(module="app", env=None):
+    """
+    Import a backend module in a fresh interpreter and break down the time
+
+    Args:
+        module (str): Backend module to import
+        env (dict): Extra environment variables for the interpreter
+
+    Returns:
+        dict: total_ms, direct imports, all imports and the sorted list of
+            every module loaded by the import
+    """
+    code = f"import {module}\nimport sys, json\nprint(json.dumps(sorted(sys.modules)))"
+    run_env = dict(os.environ, WARMUP_IMPORTS="False", **(env or {}))
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BACKEND_DIR, env=run_env, capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr[-2000:]}")
+
+    imports = parse_importtime(completed.stderr)
+    # The module's own line is the last top-level entry; its children are printed just before it
+    index = max(i for i, entry in enumerate(imports) if entry["depth"] == 0 and entry["name"] == module)
+    first = index
+    while first > 0 and imports[first - 1]["depth"] > 0:
+        first -= 1
+    subtree = imports[first:index + 1]
+    loaded = json.loads(completed.stdout.strip().splitlines()[-1])
+    return {
+        "module": module,
+        "total_ms": imports[index]["cumulative_ms"],
+        "direct": [entry for entry in subtree if entry["depth"] == 1],
+        "imports": subtree,
+        "loaded": loaded,
+    }
+
+
+def heavy_modules_loaded(report, forbidden=HEAVY_MODULES):
+    """Return the forbidden top-level packages found in a report's loaded modules"""
+    loaded = {name.split(".")[0] for name in report["loaded"]}
+    return sorted(name for name in forbidden if name in loaded)
+
+
+def format_report(report, top=15):
+    """Render a measure_import() report as a text table"""
+    lines = [f"import {report['module']}: {report['total_ms']:.1f} ms", "", "Direct imports (cumulative):"]
+    for entry in sorted(report["direct"], key=lambda e: e["cumulative_ms"], reverse=True)[:top]:
+        lines.append(f"  {entry['name']:<40} {entry['cumulative_ms']:9.1f} ms")
+    lines += ["", "Slowest modules (self):"]
+    for entry in sorted(report["imports"], key=lambda e: e["self_ms"], reverse=True)[:top]:
+        lines.append(f"  {entry['name']:<40} {entry['self_ms']:9.1f} ms")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Break down the import time of a backend module")
+    parser.add_argument("--module", default="app", help="backend module to import (default: app)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="fresh interpreters to run; the fastest is reported (default: 3)")
+    parser.add_argument("--top", type=int, default=15, help="rows per table (default: 15)")
+    parser.add_argument("--forbid", nargs="*", default=list(HEAVY_MODULES),
+                        help="packages the import must not load; pass no names to skip the check "
+                             f"(default: {' '.join(HEAVY_MODULES)})")
+    parser.add_argument("--budget-ms", type=float, help="fail if the import takes longer than this")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    report = min((measure_import(args.module) for _ in range(max(1, args.repeat))),
+                 key=lambda r: r["total_ms"])
+    heavy = heavy_modules_loaded(report, args.forbid)
+    print(format_report(report, args.top))
+    print()
+    print(f"Heavy modules loaded: {', '.join(heavy) if heavy else 'none'}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(dict(report, heavy=heavy), indent=2))
+
+    failed = bool(heavy)
+    if args.budget_ms is not None and report["total_ms"] > args.budget_ms:
+        print(f"import {args.module} took {report['total_ms']:.1f} ms, over the {args.budget_ms:.0f} ms budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,413 @@
+"""
+End-to-end load test for the Flask backend
+
+Starts the fake LiteLLM server, launches backend/app.py pointed at it and
+drives the API endpoints either closed-loop (a fixed number of concurrent
+clients) or open-loop (a fixed arrival rate), then reports throughput and
+p50/p95/p99 latency per endpoint.
+
+Examples:
+    # 8 concurrent clients for 60 seconds, captions only
+    python loadtest.py --endpoints generate-caption --concurrency 8 --duration 60
+
+    # 5 requests/s open-loop mix of uploads and captions, 2 transcription workers
+    python loadtest.py --endpoints upload-audio:1,generate-caption:4 --rate 5 \\
+        --env TRANSCRIBE_WORKERS=2
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+from conftest import SAMPLE_RATE, synthetic_speech, wav_bytes
+from fake_litellm import add_config_arguments, config_from_args, start_fake_server
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+ENDPOINTS = {
+    "transcribe": "/api/transcribe",
+    "upload-audio": "/api/upload-audio",
+    "generate-caption": "/api/generate-caption",
+    "generate-caption-stream": "/api/generate-caption/stream",
+}
+
+# Endpoints that need the Whisper model loaded before the run starts
+AUDIO_ENDPOINTS = {"transcribe", "upload-audio"}
+
+TRANSCRIPTION_TEMPLATE = (
+    "A pelican walks past a man reading a book in St James's Park during a "
+    "heatwave in London on August {day}. Photo by Jack Taylor, frame {frame}."
+)
+
+
+def parse_endpoints(spec):
+    """Parse "name[:weight],..." into a list of (name, weight)"""
+    endpoints = []
+    for item in spec.split(","):
+        name, _, weight = item.strip().partition(":")
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(
+                f"Unknown endpoint {name!r}; choose from {', '.join(ENDPOINTS)}"
+            )
+        endpoints.append((name, float(weight or 1)))
+    return endpoints
+
+
+class RequestFactory:
+    """
+    Builds request payloads
+
+    Args:
+        audio (bytes): WAV file sent to the audio endpoints
+        distinct_transcriptions (int): Size of the transcription pool for
+            caption requests; 0 makes every request unique (no cache hits)
+    """
+
+    def __init__(self, audio, distinct_transcriptions):
+        self.audio = audio
+        self.distinct_transcriptions = distinct_transcriptions
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def transcription(self):
+        with self._lock:
+            self._counter += 1
+            n = self._counter
+        if self.distinct_transcriptions:
+            n = random.randrange(self.distinct_transcriptions)
+        return TRANSCRIPTION_TEMPLATE.format(day=1 + n % 28, frame=n)
+
+    def send(self, client, endpoint):
+        """Send one request and return (status_code, time_to_first_byte)"""
+        path = ENDPOINTS[endpoint]
+        start = time.perf_counter()
+        if endpoint == "transcribe":
+            files = {"audio_file": ("load.wav", self.audio, "audio/wav")}
+            response = client.post(path, files=files)
+        elif endpoint == "upload-audio":
+            files = {"audio_blob": ("blob.wav", self.audio, "audio/wav")}
+            response = client.post(path, files=files)
+        elif endpoint == "generate-caption":
+            response = client.post(path, json={"transcription": self.transcription()})
+        else:
+            with client.stream("POST", path, json={"transcription": self.transcription()}) as response:
+                first_byte = None
+                status = response.status_code
+                for line in response.iter_lines():
+                    if first_byte is None:
+                        first_byte = time.perf_counter() - start
+                    # Failures after the headers are sent arrive as an error event
+                    if line == "event: error":
+                        status = "stream-error"
+                return status, first_byte
+        return response.status_code, None
+
+
+class Recorder:
+    """Collects per-endpoint latencies and status codes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.first_bytes = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.errors = defaultdict(Counter)
+
+    def record(self, endpoint, latency, status=None, first_byte=None, error=None):
+        with self._lock:
+            self.statuses[endpoint][status or "exception"] += 1
+            if error is not None:
+                self.errors[endpoint][error] += 1
+                return
+            self.latencies[endpoint].append(latency)
+            if first_byte is not None:
+                self.first_bytes[endpoint].append(first_byte)
+
+    def summary(self, elapsed):
+        """Build the per-endpoint report plus an "all" row"""
+        def row(latencies, statuses, first_bytes=()):
+            total = sum(statuses.values())
+            ok = sum(count for status, count in statuses.items() if status == 200)
+            result = {
+                "requests": total,
+                "ok": ok,
+                "error_rate": round(1 - ok / total, 4) if total else 0.0,
+                "throughput_rps": round(ok / elapsed, 3) if elapsed else 0.0,
+                "statuses": {str(status): count for status, count in statuses.items()},
+            }
+            if latencies:
+                p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+                result.update(
+                    mean_ms=round(1000 * float(np.mean(latencies)), 1),
+                    p50_ms=round(1000 * p50, 1),
+                    p95_ms=round(1000 * p95, 1),
+                    p99_ms=round(1000 * p99, 1),
+                    max_ms=round(1000 * max(latencies), 1),
+                )
+            if first_bytes:
+                result["ttfb_p50_ms"] = round(1000 * float(np.percentile(first_bytes, 50)), 1)
+            return result
+
+        with self._lock:
+            report = {
+                endpoint: row(self.latencies[endpoint], self.statuses[endpoint], self.first_bytes[endpoint])
+                for endpoint in self.statuses
+            }
+            all_latencies = [value for values in self.latencies.values() for value in values]
+            all_statuses = sum(self.statuses.values(), Counter())
+            report["all"] = row(all_latencies, all_statuses)
+            for endpoint, errors in self.errors.items():
+                report[endpoint]["exceptions"] = dict(errors.most_common(5))
+        return report
+
+
+def issue(client, factory, recorder, endpoint, scheduled):
+    """Send one request; latency is measured from its scheduled start"""
+    try:
+        queued = time.perf_counter() - scheduled
+        status, first_byte = factory.send(client, endpoint)
+        if first_byte is not None:
+            first_byte += queued
+        recorder.record(endpoint, time.perf_counter() - scheduled, status, first_byte)
+    except httpx.HTTPError as e:
+        recorder.record(endpoint, None, error=type(e).__name__)
+
+
+def run_closed_loop(client, factory, recorder, endpoints, concurrency, deadline, max_requests):
+    """Each of `concurrency` clients sends its next request as soon as the last one returns"""
+    names, weights = zip(*endpoints)
+    remaining = [max_requests]
+    lock = threading.Lock()
+
+    def take():
+        with lock:
+            if remaining[0] is not None:
+                if remaining[0] <= 0:
+                    return False
+                remaining[0] -= 1
+        return time.perf_counter() < deadline
+
+    def worker():
+        while take():
+            endpoint = random.choices(names, weights)[0]
+            issue(client, factory, recorder, endpoint, time.perf_counter())
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def run_open_loop(client, factory, recorder, endpoints, rate, deadline, max_requests, max_in_flight):
+    """
+    Send requests on a Poisson arrival schedule regardless of how fast the
+    server answers, so queueing delay shows up in the latencies instead of
+    silently lowering the offered load
+    """
+    names, weights = zip(*endpoints)
+    sent = 0
+    next_arrival = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        while next_arrival < deadline and (max_requests is None or sent < max_requests):
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            endpoint = random.choices(names, weights)[0]
+            pool.submit(issue, client, factory, recorder, endpoint, next_arrival)
+            sent += 1
+            next_arrival += random.expovariate(rate)
+
+
+def start_app(fake_url, port, extra_env, log_file):
+    """Launch backend/app.py as a subprocess pointed at the fake LiteLLM server"""
+    env = dict(os.environ)
+    env.update({
+        "LITELLM_API_URL": fake_url,
+        "LITELLM_API_KEY": "sk-fake-load-test",
+        "PORT": str(port),
+        "DEBUG": "False",
+        "LOG_LEVEL": env.get("LOG_LEVEL", "WARNING"),
+        # Load the model at startup; /api/ready stays at 503 until something loads it
+        "WHISPER_PRELOAD": "True",
+    })
+    env.update(extra_env)
+    return subprocess.Popen(
+        [sys.executable, "app.py"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=log_file,
+        stderr=subprocess.STDOUT,
+    )
+
+
+def wait_for_app(base_url, path, timeout, process=None):
+    """Poll an endpoint until it returns 200 or the timeout expires"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"app.py exited with status {process.returncode}")
+        try:
+            response = httpx.get(base_url + path, timeout=2)
+            if response.status_code == 200:
+                return
+            # /api/ready reports a failed model load instead of staying at 503 forever
+            if response.headers.get("content-type", "").startswith("application/json"):
+                status = response.json()
+                for model in (status, status.get("draft") or {}):
+                    if model.get("state") == "error":
+                        raise RuntimeError(f"Model failed to load: {model.get('error')}")
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"{base_url}{path} not ready after {timeout}s")
+
+
+def warm_up(client, factory, endpoints):
+    """Send one request per endpoint so model loading is not in the measurements"""
+    for endpoint, _ in endpoints:
+        try:
+            factory.send(client, endpoint)
+        except httpx.HTTPError as e:
+            print(f"Warm-up request to {endpoint} failed: {e}", file=sys.stderr)
+
+
+def print_report(report, elapsed, fake_stats):
+    columns = ("requests", "ok", "throughput_rps", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms")
+    print(f"\nDuration: {elapsed:.1f}s")
+    print(f"{'endpoint':<26}" + "".join(f"{column:>15}" for column in columns))
+    for endpoint, row in report.items():
+        print(f"{endpoint:<26}" + "".join(f"{row.get(column, '-'):>15}" for column in columns))
+    for endpoint, row in report.items():
+        if endpoint == "all":
+            continue
+        details = f"statuses={row['statuses']}"
+        if "ttfb_p50_ms" in row:
+            details += f" ttfb_p50_ms={row['ttfb_p50_ms']}"
+        if "exceptions" in row:
+            details += f" exceptions={row['exceptions']}"
+        print(f"  {endpoint}: {details}")
+    print(f"Fake LiteLLM: {fake_stats}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--endpoints", type=parse_endpoints, default=parse_endpoints("generate-caption"),
+                        help=f"comma-separated name[:weight] list from {', '.join(ENDPOINTS)} "
+                             "(default: generate-caption)")
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--concurrency", type=int, default=4,
+                      help="closed-loop: number of concurrent clients (default: 4)")
+    load.add_argument("--rate", type=float, help="open-loop: requests per second (Poisson arrivals)")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to run (default: 30)")
+    parser.add_argument("--requests", type=int, help="stop after this many requests")
+    parser.add_argument("--max-in-flight", type=int, default=256,
+                        help="open-loop: cap on outstanding requests (default: 256)")
+    parser.add_argument("--audio", type=Path,
+                        help="audio file for the audio endpoints (default: synthetic speech)")
+    parser.add_argument("--audio-seconds", type=float, default=10,
+                        help="length of the synthetic audio (default: 10)")
+    parser.add_argument("--distinct-transcriptions", type=int, default=0,
+                        help="size of the caption transcription pool; 0 = all unique (default: 0)")
+    parser.add_argument("--no-warmup", action="store_true", help="skip the warm-up requests")
+    parser.add_argument("--app-url", help="drive an already running app instead of starting one "
+                                          "(it must already point at the fake server)")
+    parser.add_argument("--port", type=int, default=8765, help="port for the launched app (default: 8765)")
+    parser.add_argument("--fake-port", type=int, default=0, help="port for the fake server (default: any)")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra environment for the launched app, e.g. TRANSCRIBE_WORKERS=2")
+    parser.add_argument("--ready-timeout", type=float, default=600,
+                        help="seconds to wait for the app and Whisper model (default: 600)")
+    parser.add_argument("--json", type=Path, help="also write the report to this file")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    fake = start_fake_server(config_from_args(args), port=args.fake_port)
+    print(f"Fake LiteLLM server on {fake.url}")
+
+    process = None
+    log_file = tempfile.NamedTemporaryFile(prefix="loadtest-app-", suffix=".log", delete=False)
+    try:
+        if args.app_url:
+            base_url = args.app_url.rstrip("/")
+        else:
+            extra_env = dict(item.split("=", 1) for item in args.env)
+            process = start_app(fake.url, args.port, extra_env, log_file)
+            base_url = f"http://127.0.0.1:{args.port}"
+            print(f"Started app.py on {base_url} (log: {log_file.name})")
+
+        wait_for_app(base_url, "/api/health", args.ready_timeout, process)
+        names = {name for name, _ in args.endpoints}
+        # An app started elsewhere may not preload; the warm-up requests load the model instead
+        if names & AUDIO_ENDPOINTS and process is not None:
+            print("Waiting for the Whisper model to load...")
+            wait_for_app(base_url, "/api/ready", args.ready_timeout, process)
+
+        if args.audio:
+            audio = args.audio.read_bytes()
+        else:
+            audio = wav_bytes(synthetic_speech(args.audio_seconds), SAMPLE_RATE)
+        factory = RequestFactory(audio, args.distinct_transcriptions)
+        recorder = Recorder()
+
+        pool_size = args.max_in_flight if args.rate else args.concurrency
+        limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        with httpx.Client(base_url=base_url, timeout=300, limits=limits) as client:
+            if not args.no_warmup:
+                warm_up(client, factory, args.endpoints)
+
+            mode = f"open-loop at {args.rate} req/s" if args.rate else f"closed-loop with {args.concurrency} clients"
+            print(f"Running {mode} for up to {args.duration}s...")
+            start = time.perf_counter()
+            deadline = start + args.duration
+            if args.rate:
+                run_open_loop(client, factory, recorder, args.endpoints, args.rate,
+                              deadline, args.requests, args.max_in_flight)
+            else:
+                run_closed_loop(client, factory, recorder, args.endpoints, args.concurrency,
+                                deadline, args.requests)
+            elapsed = time.perf_counter() - start
+
+        report = recorder.summary(elapsed)
+        with fake.stats_lock:
+            fake_stats = dict(fake.stats)
+        print_report(report, elapsed, fake_stats)
+
+        if args.json:
+            args.json.write_text(json.dumps({
+                "config": {key: str(value) for key, value in vars(args).items()},
+                "duration_seconds": round(elapsed, 3),
+                "endpoints": report,
+                "fake_litellm": fake_stats,
+            }, indent=2))
+            print(f"Report written to {args.json}")
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        log_file.close()
+        fake.shutdown()
+
+
+if __name__ == "__main__":
+    main()
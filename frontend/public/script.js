@@ -57,6 +57,10 @@ const stepAddDetails = document.getElementById('stepAddDetails');
 // API Endpoints
 const API_UPLOAD_AUDIO = '/api/upload-audio';
 const API_GENERATE_CAPTION = '/api/generate-caption';
+const API_GENERATE_CAPTION_STREAM = '/api/generate-caption/stream';
+const API_SESSIONS = '/api/sessions';
+const API_JOBS = '/api/jobs';
+const JOB_POLL_INTERVAL_MS = 1000;
 
 // Global state
 let mediaRecorder;
@@ -65,6 +69,7 @@ let currentTranscription = '';
 let additionalMediaRecorder;
 let additionalAudioChunks = [];
 let storedMissingInfo = [];
+let currentSessionId = null;
 
 // Initialize
 document.addEventListener('DOMContentLoaded', init);
@@ -129,26 +134,40 @@ async function stopRecording() {
         stopButton.classList.add('hidden');
         recordingStatus.textContent = 'Processing...';
         recordingStatus.classList.remove('recording');
-        showLoading('Transcribing...');
+        showLoading('Transcribing and generating caption...');
 
-        console.log('Stopping recording and transcribing...');
+        console.log('Stopping recording, transcribing and captioning...');
 
-        // Call Python function - it records, stops, and transcribes all in one!
-        const result = await pywebview.api.stop_recording();
+        // One Python call records, stops, transcribes and captions
+        const result = await pywebview.api.stop_recording_and_caption();
 
         if (!result.success) {
             throw new Error(result.error || 'Failed to process recording');
         }
 
-        // Set the transcription
-        currentTranscription = result.transcription;
-
-        // Auto-generate caption immediately (skip preview step)
         recordButton.classList.remove('hidden');
         recordingStatus.textContent = '';
 
-        // Automatically generate caption
-        await generateCaption();
+        // Nothing was said - no caption to show
+        if (result.speech_detected === false) {
+            hideLoading();
+            showToast('⚠️ No speech detected - please try again');
+            return;
+        }
+
+        console.log('Pipeline timings:', result.timings);
+
+        // Set the transcription and show the caption (skip preview step)
+        currentTranscription = result.transcription;
+        currentSessionId = null;
+        displayCaption(result);
+        hideLoading();
+        showStep('stepResult');
+
+        // Two-pass mode: swap in the main model's caption when it is ready
+        if (result.upgrade_job_id) {
+            applyUpgrade(result.upgrade_job_id, result.formatted_caption);
+        }
 
     } catch (error) {
         hideLoading();
@@ -159,6 +178,29 @@ async function stopRecording() {
     }
 }
 
+// Two-pass upgrade: poll the background job and replace the draft caption if
+// the main model heard something different and the user hasn't moved on
+async function applyUpgrade(jobId, draftCaption) {
+    try {
+        let job;
+        do {
+            await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+            const response = await fetch(`${API_JOBS}/${jobId}`);
+            if (!response.ok) return;
+            job = await response.json();
+        } while (job.status === 'queued' || job.status === 'running');
+
+        if (job.status !== 'done' || !job.result.changed) return;
+        if (currentSessionId || formattedCaption.value !== draftCaption) return;
+
+        currentTranscription = job.result.transcription;
+        displayCaption(job.result);
+        showToast('✓ Caption updated with full transcription');
+    } catch (error) {
+        console.error('Upgrade polling error:', error);
+    }
+}
+
 // Caption Generation
 async function generateCaption() {
     try {
@@ -166,11 +208,14 @@ async function generateCaption() {
         const isUpdate = formattedCaption.value.trim().length > 0;
         showLoading(isUpdate ? 'Updating caption...' : 'Generating caption...');
 
+        // A fresh caption no longer matches any refinement session
+        currentSessionId = null;
+
         const transcriptionToUse = additionalDetails.value.trim()
             ? `${currentTranscription}\n\nAdditional details: ${additionalDetails.value.trim()}`
             : currentTranscription;
 
-        const response = await fetch(API_GENERATE_CAPTION, {
+        const response = await fetch(API_GENERATE_CAPTION_STREAM, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({ transcription: transcriptionToUse })
@@ -178,10 +223,33 @@ async function generateCaption() {
 
         if (!response.ok) throw new Error(`Server error: ${response.status}`);
 
-        const data = await response.json();
-        displayCaption(data);
-        hideLoading();
-        showStep('stepResult');
+        // Show the caption as soon as it streams in; missing info follows item by item
+        let caption = '';
+        const missingItems = [];
+        let shown = false;
+        const showResult = () => {
+            if (!shown) {
+                shown = true;
+                hideLoading();
+                showStep('stepResult');
+            }
+        };
+
+        await readEventStream(response, (event, data) => {
+            if (event === 'formatted_caption') {
+                caption = data.formatted_caption;
+                displayCaption({ formatted_caption: caption, missing_information: missingItems });
+                showResult();
+            } else if (event === 'missing_information') {
+                missingItems.push(data.missing_information);
+                displayCaption({ formatted_caption: caption, missing_information: missingItems });
+            } else if (event === 'done') {
+                displayCaption(data);
+                showResult();
+            } else if (event === 'error') {
+                throw new Error(data.error);
+            }
+        });
 
     } catch (error) {
         hideLoading();
@@ -189,6 +257,33 @@ async function generateCaption() {
     }
 }
 
+// Read a Server-Sent Events response body, calling onEvent(event, data) per message
+async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const message = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let event = 'message';
+            let data = '';
+            message.split('\n').forEach(line => {
+                if (line.startsWith('event: ')) event = line.slice(7);
+                else if (line.startsWith('data: ')) data += line.slice(6);
+            });
+            onEvent(event, data ? JSON.parse(data) : {});
+        }
+    }
+}
+
 function displayCaption(data) {
     console.log('displayCaption received:', data);
     console.log('missing_information:', data.missing_information);
@@ -198,8 +293,8 @@ function displayCaption(data) {
 
     // Handle missing information
     const additionalDetailsSection = document.getElementById('additionalDetailsSection');
+    storedMissingInfo = data.missing_information || [];
     if (data.missing_information && data.missing_information.length > 0) {
-        storedMissingInfo = data.missing_information;
         missingInfoList.innerHTML = '';
         data.missing_information.forEach(item => {
             const li = document.createElement('li');
@@ -251,15 +346,19 @@ async function stopAdditionalRecording() {
             throw new Error(result.error || 'Failed to process recording');
         }
 
-        // Merge with current transcription
-        currentTranscription = currentTranscription + '\n\nAdditional details: ' + result.transcription;
-
         // Reset UI
         recordAdditionalButton.classList.remove('hidden');
         additionalRecordingStatus.textContent = '';
 
-        // Auto-generate updated caption
-        await generateCaption();
+        // Nothing was said - keep the current caption
+        if (result.speech_detected === false) {
+            hideLoading();
+            showToast('⚠️ No speech detected - please try again');
+            return;
+        }
+
+        // Auto-update the caption with just the new details
+        await refineCaption(result.transcription);
 
     } catch (error) {
         hideLoading();
@@ -286,15 +385,64 @@ function updateCaption() {
         return;
     }
 
-    // Merge additional details into the main transcription for next iteration
-    currentTranscription = currentTranscription + '\n\nAdditional details: ' + additionalDetails.value.trim();
+    const details = additionalDetails.value.trim();
     additionalDetails.value = ''; // Clear for next round
 
     // Hide type section after updating
     const typeSection = document.getElementById('typeSection');
     typeSection.classList.add('hidden');
 
-    generateCaption();
+    refineCaption(details);
+}
+
+// Refinement - the server keeps the conversation, so only the new details are sent
+async function refineCaption(details) {
+    try {
+        showLoading('Updating caption...');
+
+        // Seed a session with the caption already on screen (no extra model call)
+        if (!currentSessionId) {
+            const sessionResponse = await fetch(API_SESSIONS, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({
+                    transcription: currentTranscription,
+                    formatted_caption: formattedCaption.value,
+                    missing_information: storedMissingInfo
+                })
+            });
+            if (!sessionResponse.ok) throw new Error(`Server error: ${sessionResponse.status}`);
+            currentSessionId = (await sessionResponse.json()).session_id;
+        }
+
+        const response = await fetch(`${API_SESSIONS}/${currentSessionId}/refine`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ details })
+        });
+
+        // Keep the full transcript locally so an expired session can be rebuilt
+        if (response.ok || response.status === 404) {
+            currentTranscription = currentTranscription + '\n\nAdditional details: ' + details;
+        }
+
+        if (response.status === 404) {
+            // Session expired - regenerate from the full transcript instead
+            await generateCaption();
+            return;
+        }
+
+        if (!response.ok) throw new Error(`Server error: ${response.status}`);
+
+        const data = await response.json();
+        displayCaption(data);
+        hideLoading();
+        showStep('stepResult');
+
+    } catch (error) {
+        hideLoading();
+        showToast(`⚠️ Error: ${error.message}`);
+    }
 }
 
 // UI Actions
@@ -314,6 +462,7 @@ function startOver() {
     audioPlayback.src = '';
     additionalAudioPlayback.src = '';
     storedMissingInfo = [];
+    currentSessionId = null;
 
     // Reset buttons
     recordButton.classList.remove('hidden');
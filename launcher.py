@@ -7,6 +7,7 @@ Starts the Flask server and opens a native Mac window
 import os
 import sys
 import threading
+import multiprocessing
 import time
 import logging
 from pathlib import Path
@@ -22,44 +23,132 @@ from werkzeug.serving import make_server
 class API:
     """API class to expose Python functions to JavaScript"""
 
+    def __init__(self):
+        # Rolling transcript of the current recording when streaming is enabled
+        self._streaming_transcriber = None
+
     def start_recording(self):
         """Start native audio recording"""
         try:
-            from audio_recorder import start_recording
+            from audio_recorder import start_recording, get_recorder
+            import whisper_service
             logger = logging.getLogger(__name__)
             logger.info("API: start_recording called")
-            success = start_recording()
+
+            if whisper_service.WHISPER_STREAMING:
+                # Transcribe finished windows in the background while recording
+                transcriber = whisper_service.StreamingTranscriber()
+                success = start_recording(
+                    on_window=transcriber.submit_window,
+                    window_seconds=whisper_service.WHISPER_STREAM_WINDOW_SECONDS,
+                )
+                # The recorder may have fallen back to another rate while opening
+                transcriber.sample_rate = get_recorder().sample_rate
+                if not success:
+                    transcriber.finish()
+                    transcriber = None
+                self._streaming_transcriber = transcriber
+            else:
+                success = start_recording()
             return {"success": success}
         except Exception as e:
             logging.error(f"API: start_recording error: {e}")
             return {"success": False, "error": str(e)}
 
+    def _stop_and_transcribe(self):
+        """
+        Stop recording and transcribe the captured audio in memory
+
+        Returns:
+            dict: Transcription result, or None if nothing was recorded
+        """
+        from audio_recorder import stop_recording_audio, get_consumed_frames
+        from whisper_service import transcribe_audio_with_details, resample_audio
+
+        # Stop recording and get the captured audio
+        audio, sample_rate = stop_recording_audio()
+
+        transcriber, self._streaming_transcriber = self._streaming_transcriber, None
+
+        if audio is None:
+            if transcriber is not None:
+                transcriber.finish()
+            return None
+
+        if transcriber is not None:
+            # Earlier windows are already transcribed; only the tail is left
+            transcription = transcriber.finish(audio[get_consumed_frames():])
+            return {"transcription": transcription, "speech_detected": bool(transcription)}
+
+        # Transcribe the audio in memory (no-op resample at 16 kHz)
+        return transcribe_audio_with_details(resample_audio(audio, sample_rate))
+
     def stop_recording(self):
         """Stop recording and return transcription"""
         try:
-            from audio_recorder import stop_recording
-            from whisper_service import transcribe_audio, cleanup_audio_file
-
             logger = logging.getLogger(__name__)
             logger.info("API: stop_recording called")
 
-            # Stop recording and get file path
-            file_path = stop_recording()
+            result = self._stop_and_transcribe()
 
-            if not file_path:
+            if result is None:
                 return {"success": False, "error": "Recording failed"}
 
-            # Transcribe the audio
-            transcription = transcribe_audio(file_path)
+            logger.info(f"API: transcription complete: {result['transcription']}")
+            return {"success": True, **result}
+
+        except Exception as e:
+            logging.error(f"API: stop_recording error: {e}")
+            return {"success": False, "error": str(e)}
+
+    def stop_recording_and_caption(self):
+        """Stop recording, transcribe and caption in one call from JavaScript"""
+        try:
+            from pipeline_service import caption_from_audio
 
-            # Clean up the file
-            cleanup_audio_file(file_path)
+            logger = logging.getLogger(__name__)
+            logger.info("API: stop_recording_and_caption called")
+
+            import whisper_service
+
+            if whisper_service.WHISPER_DRAFT_MODEL and self._streaming_transcriber is None:
+                # Two-pass: caption a draft now, upgrade with the main model in the background
+                from audio_recorder import stop_recording_audio
+                from pipeline_service import caption_from_audio_two_pass
+
+                audio, sample_rate = stop_recording_audio()
+                if audio is None:
+                    return {"success": False, "error": "Recording failed"}
+                result = caption_from_audio_two_pass(
+                    whisper_service.resample_audio(audio, sample_rate)
+                )
+                logger.info(f"API: draft caption pipeline complete: {result['timings']}")
+                return {"success": True, **result}
+
+            def transcribe():
+                result = self._stop_and_transcribe()
+                if result is None:
+                    raise RuntimeError("Recording failed")
+                return result
+
+            result = caption_from_audio(transcribe)
+            logger.info(f"API: caption pipeline complete: {result['timings']}")
+            return {"success": True, **result}
 
-            logger.info(f"API: transcription complete: {transcription}")
-            return {"success": True, "transcription": transcription}
+        except Exception as e:
+            logging.error(f"API: stop_recording_and_caption error: {e}")
+            return {"success": False, "error": str(e)}
 
+    def generate_caption(self, transcription):
+        """Generate a caption on the shared async caption engine"""
+        try:
+            from pipeline_service import generate_caption
+            logger = logging.getLogger(__name__)
+            logger.info("API: generate_caption called")
+            caption = generate_caption(transcription)
+            return {"success": True, **caption}
         except Exception as e:
-            logging.error(f"API: stop_recording error: {e}")
+            logging.error(f"API: generate_caption error: {e}")
             return {"success": False, "error": str(e)}
 
     def is_recording(self):
@@ -118,47 +207,88 @@ def on_closing():
     logger.info("Cleanup complete")
 
 
-def main():
-    """Main function to launch the app"""
-    # Set up logging
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+# Shown while the Flask server starts, so the window appears immediately
+LOADING_HTML = """<!DOCTYPE html>
+<html>
+<body style="margin:0;height:100vh;display:flex;align-items:center;justify-content:center;
+             font-family:-apple-system,Helvetica,sans-serif;color:#123015;background:#FFFFFF">
+  <div style="text-align:center">
+    <div style="font-size:22px;font-weight:600;color:#D64000">Reuters Photo Caption Generator</div>
+    <div id="status" style="margin-top:12px;font-size:15px">Starting up&hellip;</div>
+  </div>
+</body>
+</html>
+"""
+
+
+def show_startup_error(window):
+    """Replace the loading message with a startup failure notice"""
+    window.evaluate_js(
+        "document.getElementById('status').textContent = "
+        "'The caption server failed to start. Please restart the app.'"
     )
-    logger = logging.getLogger(__name__)
 
-    # Start Flask server
-    flask_server.start()
 
-    # Get port from environment or use default
-    port = int(os.getenv("PORT", 8000))
-    url = f"http://127.0.0.1:{port}"
+def start_app(window, url, timeout=30):
+    """
+    Start the Flask server and load the app into the window once it answers /api/health
+
+    Runs on pywebview's worker thread after the window has opened.
+
+    Args:
+        window: The pywebview window showing LOADING_HTML
+        url (str): Base URL of the Flask server
+        timeout (float): Seconds to wait before showing an error
+    """
+    import urllib.request
+    logger = logging.getLogger(__name__)
+
+    # Start Flask server (the app imports its heavy services in the background)
+    try:
+        flask_server.start()
+    except Exception as e:
+        logger.error(f"Error starting Flask server: {str(e)}")
+        show_startup_error(window)
+        return
 
     # Wait for Flask to be ready
     logger.info("Waiting for Flask server to be ready...")
-    max_attempts = 30
-    for attempt in range(max_attempts):
+    deadline = time.monotonic() + timeout
+    while True:
         try:
-            import urllib.request
             urllib.request.urlopen(f"{url}/api/health", timeout=1)
-            logger.info("Flask server is ready!")
             break
         except Exception:
-            if attempt < max_attempts - 1:
-                time.sleep(0.5)
-            else:
+            if time.monotonic() >= deadline:
                 logger.error("Flask server failed to start!")
+                show_startup_error(window)
                 return
+            time.sleep(0.1)
 
     logger.info(f"Opening Reuters Caption Generator at {url}")
+    window.load_url(url)
+
+
+def main():
+    """Main function to launch the app"""
+    # Set up logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    logger = logging.getLogger(__name__)
+
+    # Get port from environment or use default
+    port = int(os.getenv("PORT", 8000))
+    url = f"http://127.0.0.1:{port}"
 
     # Create API instance
     api = API()
 
-    # Create pywebview window with Python API bridge
+    # Open the window straight away on a loading page; start_app swaps in the app
     window = webview.create_window(
         title="Reuters Photo Caption Generator",
-        url=url,
+        html=LOADING_HTML,
         width=1200,
         height=800,
         resizable=True,
@@ -172,10 +302,12 @@ def main():
     logger.info("Starting pywebview window...")
 
     # Start the GUI (this blocks until window is closed)
-    webview.start()
+    webview.start(start_app, (window, url))
 
     logger.info("Application shut down successfully")
 
 
 if __name__ == "__main__":
+    # Lets the packaged app start transcription pool workers (WHISPER_POOL_WORKERS)
+    multiprocessing.freeze_support()
     main()
@@ -11,6 +11,12 @@ DATA_FILES = [
         "backend/app.py",
         "backend/claude_service.py",
         "backend/whisper_service.py",
+        "backend/job_service.py",
+        "backend/cache_service.py",
+        "backend/pipeline_service.py",
+        "backend/metrics_service.py",
+        "backend/profiling_service.py",
+        "backend/upload_service.py",
         "backend/.env.example",
     ]),
 ]
@@ -34,6 +40,12 @@ OPTIONS = {
         "app",
         "claude_service",
         "whisper_service",
+        "job_service",
+        "cache_service",
+        "pipeline_service",
+        "metrics_service",
+        "profiling_service",
+        "upload_service",
     ],
     "excludes": [
         "tkinter",